@@ -1,11 +1,10 @@
 import cv2
-from paddleocr import PaddleOCR
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import os
 
-# Initialize PaddleOCR (supports multiple languages, including English and Persian)
-ocr = PaddleOCR(use_angle_cls=True, lang='en')  # Change 'en' to 'fa' for Farsi if needed
+from ocr_processor.engine import get_ocr_engine
+from ocr_processor.tiling import ocr_image_file_tiled
 
 # Function to calculate font size based on bounding box height
 def calculate_font_size(bbox):
@@ -52,29 +51,37 @@ def create_positional_pdf_with_font_size(ocr_results, output_pdf, img_width, img
 
     c.save()
 
-def main(image_path, output_pdf_path):
+def main(image_path, output_pdf_path, tiled=False):
     """
     Main function to perform OCR and generate a PDF.
 
     Parameters:
         image_path (str): Path to the input image file.
         output_pdf_path (str): Path to save the output PDF.
+        tiled (bool): OCR very large scans (e.g. A0 drawings) in overlapping
+            tiles at full resolution. The source image is still decoded once;
+            the tiles, not the decode, are bounded in memory.
     """
     # Validate input file
     if not os.path.exists(image_path):
         print(f"Error: File not found at {image_path}")
         return
 
-    # Load the image and convert to grayscale
+    if tiled:
+        ocr_results, image_width, image_height = ocr_image_file_tiled(image_path, lang='en')
+        create_positional_pdf_with_font_size(ocr_results, output_pdf_path, image_width, image_height)
+        print(f"Tiled OCR results with positions and estimated font sizes saved to {output_pdf_path}")
+        return
+
+    # Load the image
     image = cv2.imread(image_path)
     if image is None:
         print(f"Error: Unable to load image at {image_path}")
         return
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-    # Perform OCR using PaddleOCR
-    ocr_results = ocr.ocr(image_path, cls=True)
+    # Perform OCR using the shared PaddleOCR engine (supports multiple languages,
+    # including English and Persian; pass lang='fa' for Farsi) on the already decoded image
+    ocr_results = get_ocr_engine(lang='en').ocr(image, cls=True)
 
     # Get the image dimensions
     image_height, image_width, _ = image.shape
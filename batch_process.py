@@ -0,0 +1,363 @@
+"""
+batch_process.py
+
+Batch and daemon entry point for the PDF extraction pipeline.
+
+Processing documents one per interpreter run pays for Python startup and the
+PaddleOCR model load on every file. This script keeps one process (and
+optionally one warm OCR worker pool) alive for many documents:
+
+- Batch mode takes directories, glob patterns, single files and/or a
+  newline-delimited manifest and processes every PDF they name.
+- Watch mode polls a spool directory and processes new PDFs as they arrive,
+  moving each one to a "processed" or "failed" subdirectory afterwards.
+
+Every document produces one JSON line with its status, so a bad file is
+reported and skipped instead of ending the run.
+
+Usage:
+    python batch_process.py invoices/ "scans/*.pdf" --output results.jsonl
+    python batch_process.py --manifest todo.txt --workers 4
+    python batch_process.py --watch spool/ --output results.jsonl
+    python batch_process.py --watch spool/ --fingerprint-db fingerprints.db
+    python batch_process.py invoices/ --metrics-file /var/lib/node_exporter/pdf.prom --metrics-log -
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from process_bridge import process_pdf
+from ocr_processor import (
+    FingerprintIndex,
+    JSONLogMetrics,
+    MultiMetrics,
+    OCRCache,
+    OCRWorkerPool,
+    PrometheusMetrics,
+    set_metrics,
+)
+from ocr_processor.metrics import count, get_metrics
+
+
+def collect_inputs(sources, manifest=None):
+    """
+    Expand directories, glob patterns, file paths and a manifest into PDF paths.
+
+    Args:
+        sources (list): Directories, glob patterns or file paths.
+        manifest (str, optional): File with one path per line. Blank lines and
+            lines starting with '#' are ignored.
+
+    Returns:
+        list: PDF paths in the order given, without duplicates.
+    """
+    candidates = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as file:
+            candidates.extend(line.strip() for line in file if line.strip() and not line.lstrip().startswith("#"))
+
+    for source in sources:
+        if os.path.isdir(source):
+            candidates.extend(sorted(glob.glob(os.path.join(source, "*.pdf")) + glob.glob(os.path.join(source, "*.PDF"))))
+        elif glob.has_magic(source):
+            candidates.extend(sorted(glob.glob(source, recursive=True)))
+        else:
+            candidates.append(source)
+
+    seen = set()
+    pdf_paths = []
+    for path in candidates:
+        if path not in seen:
+            seen.add(path)
+            pdf_paths.append(path)
+    return pdf_paths
+
+
+def output_name(pdf_path):
+    """
+    Name the per-document outputs of a PDF, unique to its location.
+
+    The file name is kept for readability and followed by a short hash of
+    the absolute path, so two inputs with the same name in different
+    directories never share a checkpoint or overwrite each other's output.
+
+    Args:
+        pdf_path (str): Path to the input PDF.
+
+    Returns:
+        str: e.g. "invoice-3f2a9c1d" for invoices/2024/invoice.pdf.
+    """
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()[:8]
+    return f"{stem}-{digest}"
+
+
+def process_document(pdf_path, ocr_pdf_dir=None, searchable_dir=None, checkpoint_dir=None, **pdf_options):
+    """
+    Process one PDF and describe the outcome as a JSON-serialisable record.
+
+    Errors are captured in the record instead of being raised.
+
+    Args:
+        pdf_path (str): Path to the input PDF.
+        ocr_pdf_dir (str, optional): Directory for positional OCR PDFs.
+        searchable_dir (str, optional): Directory for a searchable copy of
+            the PDF. Outputs are named by output_name().
+        checkpoint_dir (str, optional): Directory for per-document page
+            checkpoints, so a rerun after a crash resumes each document
+            where it stopped.
+        **pdf_options: Passed to process_bridge.process_pdf (pool, cache,
+            lang, layout, ...).
+
+    Returns:
+        dict: Record with path, status, text or error, and elapsed seconds.
+    """
+    start = time.perf_counter()
+    record = {"path": pdf_path}
+    try:
+        if not os.path.isfile(pdf_path):
+            raise FileNotFoundError(f"File not found at {pdf_path}")
+        name = output_name(pdf_path)
+        doc_pdf_dir = None
+        if ocr_pdf_dir:
+            doc_pdf_dir = os.path.join(ocr_pdf_dir, name)
+        searchable_pdf = None
+        if searchable_dir:
+            os.makedirs(searchable_dir, exist_ok=True)
+            searchable_pdf = os.path.join(searchable_dir, name + ".pdf")
+        checkpoint = None
+        if checkpoint_dir:
+            checkpoint = os.path.join(checkpoint_dir, name + ".checkpoint.jsonl")
+        # Progress messages go to stderr so stdout stays valid JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            text = process_pdf(pdf_path, ocr_pdf_dir=doc_pdf_dir, searchable_pdf=searchable_pdf, checkpoint=checkpoint,
+                               **pdf_options)
+        record["status"] = "ok"
+        record["text"] = text
+        if searchable_pdf:
+            record["searchable_pdf"] = searchable_pdf
+        if doc_pdf_dir:
+            record["ocr_pdf_dir"] = doc_pdf_dir
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start
+    record["elapsed_seconds"] = round(elapsed, 3)
+    get_metrics().record_span("document", elapsed, {"document": pdf_path, "status": record["status"]})
+    count("documents", status=record["status"])
+    return record
+
+
+def write_record(record, output):
+    """
+    Write a record as one JSON line and flush it immediately.
+
+    Args:
+        record (dict): Record to write.
+        output (file): Text stream to write to.
+    """
+    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+
+def run_batch(pdf_paths, output, **pdf_options):
+    """
+    Process a list of PDFs, writing one JSON line per document.
+
+    Args:
+        pdf_paths (list): Paths to the PDFs.
+        output (file): Text stream for the JSONL records.
+        **pdf_options: Passed to process_document.
+
+    Returns:
+        int: Number of documents that failed.
+    """
+    failures = 0
+    for pdf_path in pdf_paths:
+        record = process_document(pdf_path, **pdf_options)
+        if record["status"] != "ok":
+            failures += 1
+        write_record(record, output)
+        get_metrics().flush()
+    return failures
+
+
+def watch_spool(spool_dir, output, poll_interval=2.0, **pdf_options):
+    """
+    Process PDFs dropped into a spool directory until interrupted.
+
+    A file is picked up once its size has stayed the same for one poll, so
+    files that are still being copied in are left alone. After processing it is
+    moved to spool_dir/processed or spool_dir/failed.
+
+    Args:
+        spool_dir (str): Directory to watch.
+        output (file): Text stream for the JSONL records.
+        poll_interval (float): Seconds between directory scans.
+        **pdf_options: Passed to process_document.
+    """
+    processed_dir = os.path.join(spool_dir, "processed")
+    failed_dir = os.path.join(spool_dir, "failed")
+    os.makedirs(processed_dir, exist_ok=True)
+    os.makedirs(failed_dir, exist_ok=True)
+    last_sizes = {}
+
+    print(f"Watching {spool_dir} for PDFs (Ctrl+C to stop)...", file=sys.stderr)
+    while True:
+        sizes = {}
+        for entry in os.scandir(spool_dir):
+            if entry.is_file() and entry.name.lower().endswith(".pdf") and not entry.name.startswith("."):
+                sizes[entry.path] = entry.stat().st_size
+
+        for pdf_path in sorted(sizes):
+            if last_sizes.get(pdf_path) != sizes[pdf_path]:
+                continue  # New or still growing; check again on the next poll
+            record = process_document(pdf_path, **pdf_options)
+            target_dir = processed_dir if record["status"] == "ok" else failed_dir
+            target_path = os.path.join(target_dir, os.path.basename(pdf_path))
+            shutil.move(pdf_path, target_path)
+            record["moved_to"] = target_path
+            write_record(record, output)
+            get_metrics().flush()
+            del sizes[pdf_path]
+
+        last_sizes = sizes
+        time.sleep(poll_interval)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text from many PDFs, writing one JSON line per document.")
+    parser.add_argument("sources", nargs="*", help="PDF files, directories or glob patterns")
+    parser.add_argument("--manifest", help="file listing one PDF path per line")
+    parser.add_argument("--watch", metavar="SPOOL_DIR", help="keep running and process PDFs dropped into SPOOL_DIR")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between spool scans (default: 2)")
+    parser.add_argument("--output", "-o", help="JSONL output file (default: stdout)")
+    parser.add_argument("--ocr-pdf-dir", help="also write positional OCR PDFs under this directory")
+    parser.add_argument("--searchable-dir", help="also write a searchable copy of each PDF, with its OCR text "
+                                                 "laid over the scanned pages, to this directory")
+    parser.add_argument("--cache", metavar="DB_PATH", help="SQLite file for caching OCR results by page content")
+    parser.add_argument("--cache-size-mb", type=int, default=512, help="maximum OCR cache size in MB (default: 512)")
+    parser.add_argument("--fingerprint-db", metavar="DB_PATH",
+                        help="SQLite file of page hashes; scanned pages identical to an earlier page reuse its "
+                             "OCR result")
+    parser.add_argument("--reuse-similar-pages", action="store_true",
+                        help="with --fingerprint-db, also reuse the OCR of pages that only look alike (re-scans); "
+                             "unsafe when different documents share a template")
+    parser.add_argument("--max-hash-distance", type=int, default=8,
+                        help="differing hash bits (0-15) for two pages to count as duplicates (default: 8)")
+    parser.add_argument("--checkpoint-dir", metavar="DIR",
+                        help="append each finished page to a per-document checkpoint in DIR and resume from it "
+                             "when a document is processed again")
+    parser.add_argument("--page-timeout", type=float,
+                        help="seconds to wait for one page's OCR before skipping it (default: no limit)")
+    parser.add_argument("--layout", action="store_true", help="keep rows, table cells and reading order in the text")
+    parser.add_argument("--lang", default="en", help="OCR language, or languages joined with '+' such as en+fa (default: en)")
+    parser.add_argument("--batch-pages", type=int, default=1,
+                        help="without --workers, OCR this many pages per shared recognition batch (default: 1)")
+    parser.add_argument("--max-pixels", type=int, default=4_000_000, help="pixel budget per rendered page (default: 4000000)")
+    parser.add_argument("--tile-large-pages", action="store_true",
+                        help="OCR pages larger than --max-pixels in overlapping tiles at full resolution "
+                             "instead of scaling them down")
+    parser.add_argument("--color", action="store_true", help="render pages in colour instead of grayscale for OCR")
+    parser.add_argument("--deskew", action="store_true", help="straighten skewed scans before OCR")
+    parser.add_argument("--two-tier", action="store_true",
+                        help="OCR without angle classification first and re-read only low-confidence regions "
+                             "or pages with it")
+    parser.add_argument("--min-confidence", type=float, default=0.85,
+                        help="with --two-tier, regions below this confidence get a second pass (default: 0.85)")
+    parser.add_argument("--first-pass-scale", type=float, default=1.0,
+                        help="with --two-tier, image scale for the first pass, e.g. 0.5 (default: 1)")
+    parser.add_argument("--workers", type=int, default=0, help="OCR worker processes (default: OCR in this process)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="CPU threads per OCR worker (default: 1)")
+    parser.add_argument("--metrics-log", metavar="PATH",
+                        help="append a JSON line per timed stage and counter to PATH ('-' for stderr)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="write Prometheus text metrics to PATH after every document")
+    args = parser.parse_args(argv)
+    if not args.watch and not args.sources and not args.manifest:
+        parser.error("provide PDF sources, --manifest or --watch")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    pool = None
+    two_tier = None
+    if args.two_tier:
+        two_tier = {"min_confidence": args.min_confidence, "first_pass_scale": args.first_pass_scale}
+    cache = OCRCache(args.cache, max_bytes=args.cache_size_mb * 1024 * 1024) if args.cache else None
+    fingerprints = None
+    if args.fingerprint_db:
+        fingerprints = FingerprintIndex(args.fingerprint_db, max_distance=args.max_hash_distance,
+                                        confirm=not args.reuse_similar_pages)
+    if args.workers > 0 or args.page_timeout is not None:
+        # A page timeout needs OCR in a worker that can be killed; one warm worker serves every document
+        pool = OCRWorkerPool(workers=args.workers or 1, threads_per_worker=args.threads_per_worker, lang=args.lang,
+                             two_tier=two_tier)
+
+    metrics_log = None
+    sinks = []
+    if args.metrics_log:
+        metrics_log = sys.stderr if args.metrics_log == "-" else open(args.metrics_log, "a", encoding="utf-8")
+        sinks.append(JSONLogMetrics(metrics_log))
+    if args.metrics_file:
+        sinks.append(PrometheusMetrics(labels=("status", "kind", "error"), path=args.metrics_file))
+    if sinks:
+        set_metrics(sinks[0] if len(sinks) == 1 else MultiMetrics(*sinks))
+
+    pdf_options = {
+        "pool": pool,
+        "cache": cache,
+        "fingerprints": fingerprints,
+        "lang": args.lang,
+        "layout": args.layout,
+        "batch_pages": args.batch_pages,
+        "tile_large_pages": args.tile_large_pages,
+        "page_timeout": args.page_timeout,
+        "two_tier": two_tier,
+        "checkpoint_dir": args.checkpoint_dir,
+        "render_options": {"max_pixels": args.max_pixels, "grayscale": not args.color, "deskew": args.deskew},
+        "ocr_pdf_dir": args.ocr_pdf_dir,
+        "searchable_dir": args.searchable_dir,
+    }
+
+    failures = 0
+    try:
+        if args.sources or args.manifest:
+            pdf_paths = collect_inputs(args.sources, args.manifest)
+            print(f"Processing {len(pdf_paths)} PDF(s)...", file=sys.stderr)
+            failures = run_batch(pdf_paths, output, **pdf_options)
+            print(f"Done: {len(pdf_paths) - failures} succeeded, {failures} failed.", file=sys.stderr)
+        if args.watch:
+            watch_spool(args.watch, output, poll_interval=args.poll_interval, **pdf_options)
+    except KeyboardInterrupt:
+        print("\nStopped.", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.close()
+        if cache is not None:
+            print(f"OCR cache: {cache.stats()}", file=sys.stderr)
+            cache.close()
+        if fingerprints is not None:
+            print(f"Fingerprint index: {fingerprints.stats()}", file=sys.stderr)
+            fingerprints.close()
+        get_metrics().flush()
+        set_metrics(None)
+        if metrics_log not in (None, sys.stderr):
+            metrics_log.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+"""
+benchmark.py
+
+Benchmark harness for the PDF extraction pipeline.
+
+Generates a deterministic synthetic corpus of text-based, image-based and
+mixed PDFs at several page counts and resolutions, times every pipeline stage
+on it and reports pages/sec, p50/p95 latency and peak RSS as JSON.
+
+Stages:
+    detect              is_pdf_text_based, once per document
+    render              rasterize_page, per page
+    ocr                 process_image_array, per image page (skipped when
+                        PaddleOCR is not installed or with --no-ocr)
+    pdf_write           create_positional_pdf_with_font_size, per image page
+    extract_clean_text  pdf_text_extractor.extract_clean_text, per document
+    clean_and_sort_text process_bridge.clean_and_sort_text, per document
+
+The corpus is generated from a fixed seed, and the report records the git
+commit and library versions, so two runs with the same options can be
+compared. Pass --baseline with an earlier report to flag stages whose
+throughput dropped by more than --tolerance.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --kinds image --pages 5 --dpi 150 300 --repeat 3
+    python benchmark.py --no-ocr --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from check_readable_PDFs import PAGE_IMAGE, classify_page, is_pdf_text_based
+from ocr_processor import create_positional_pdf_with_font_size, rasterize_page
+from pdf_text_extractor import extract_clean_text
+from process_bridge import clean_and_sort_text
+
+STAGES = ("detect", "render", "ocr", "pdf_write", "extract_clean_text", "clean_and_sort_text")
+
+WORDS = (
+    "invoice total amount date customer address payment due number item quantity price tax "
+    "order account balance reference description service delivery contract period net gross"
+).split()
+
+
+def _page_lines(rng, lines=40, words_per_line=9):
+    """Return a page of pseudo-random text lines, with a few key: value lines like a form."""
+    page = []
+    for i in range(lines):
+        if i % 5 == 0:
+            page.append(f"{rng.choice(WORDS).title()}: {rng.randint(1, 99999)}")
+        else:
+            page.append(" ".join(rng.choice(WORDS) for _ in range(words_per_line)))
+    return page
+
+
+def generate_text_pdf(output_path, pages, seed=0):
+    """
+    Generate a PDF with a selectable text layer on every page, using ReportLab.
+
+    Args:
+        output_path (str): Path to save the PDF.
+        pages (int): Number of pages.
+        seed (int): Seed for the page text, so the corpus is identical across runs.
+    """
+    rng = random.Random(seed)
+    width, height = letter
+    c = canvas.Canvas(output_path, pagesize=letter)
+    for _ in range(pages):
+        c.setFont("Helvetica", 11)
+        y = height - 60
+        for line in _page_lines(rng):
+            c.drawString(60, y, line)
+            y -= 16
+        c.showPage()
+    c.save()
+
+
+def generate_scanned_pdf(output_path, pages, dpi, seed=0, text_pages=()):
+    """
+    Generate a PDF whose pages are images of text, like a scan.
+
+    A text PDF is generated first and each of its pages is rasterised at the
+    given resolution and placed on a new page as an image. Pages listed in
+    text_pages are copied as text instead, which gives a mixed document.
+
+    Args:
+        output_path (str): Path to save the PDF.
+        pages (int): Number of pages.
+        dpi (int): Resolution of the page images.
+        seed (int): Seed for the page text.
+        text_pages (iterable): Zero-based page numbers to keep as text.
+    """
+    text_pages = set(text_pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text_path = os.path.join(tmp_dir, "text.pdf")
+        generate_text_pdf(text_path, pages, seed)
+        with fitz.open(text_path) as src, fitz.open() as out:
+            for page in src:
+                if page.number in text_pages:
+                    out.insert_pdf(src, from_page=page.number, to_page=page.number)
+                    continue
+                pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                new_page = out.new_page(width=page.rect.width, height=page.rect.height)
+                new_page.insert_image(new_page.rect, stream=pix.tobytes("png"))
+            out.save(output_path, deflate=True)
+
+
+def build_corpus(corpus_dir, kinds=("text", "image", "mixed"), page_counts=(1, 10), dpis=(150,), seed=0):
+    """
+    Generate the synthetic corpus.
+
+    Text documents do not depend on the resolution, so one is generated per
+    page count. Every document records the text PDF its pages were made from
+    as "source".
+
+    Args:
+        corpus_dir (str): Directory to write the PDFs to.
+        kinds (iterable): Any of "text", "image" and "mixed".
+        page_counts (iterable): Page counts to generate.
+        dpis (iterable): Image resolutions to generate.
+        seed (int): Seed for the page text.
+
+    Returns:
+        list: Dicts with name, kind, pages, dpi, path and source for every document.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpus = []
+    for kind in kinds:
+        for pages in page_counts:
+            source = os.path.join(corpus_dir, f"source-{pages}p.pdf")
+            if not os.path.exists(source):
+                generate_text_pdf(source, pages, seed)
+            for dpi in (dpis if kind != "text" else (None,)):
+                name = f"{kind}-{pages}p" + (f"-{dpi}dpi" if dpi else "")
+                path = os.path.join(corpus_dir, name + ".pdf")
+                if kind == "text":
+                    generate_text_pdf(path, pages, seed)
+                elif kind == "image":
+                    generate_scanned_pdf(path, pages, dpi, seed)
+                elif kind == "mixed":
+                    generate_scanned_pdf(path, pages, dpi, seed, text_pages=range(0, pages, 2))
+                else:
+                    raise ValueError(f"Unknown corpus kind: {kind}")
+                corpus.append({"name": name, "kind": kind, "pages": pages, "dpi": dpi, "path": path,
+                               "source": source})
+    return corpus
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers, or None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # Ceiling division
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _summarise(samples):
+    """Summarise a stage's samples, a list of (seconds, pages) tuples."""
+    if not samples:
+        return {"samples": 0}
+    seconds = [s for s, _ in samples]
+    pages = sum(p for _, p in samples)
+    total = sum(seconds)
+    return {
+        "samples": len(samples),
+        "pages": pages,
+        "total_seconds": round(total, 6),
+        "pages_per_second": round(pages / total, 3) if total > 0 else None,
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 3),
+    }
+
+
+def _source_words(source, page_number, scale_x, scale_y):
+    """Return a page's text-layer words as PaddleOCR-style results, scaled to image pixels."""
+    return [[
+        [[[x0 * scale_x, y0 * scale_y], [x1 * scale_x, y0 * scale_y],
+          [x1 * scale_x, y1 * scale_y], [x0 * scale_x, y1 * scale_y]], (word, 1.0)]
+        for x0, y0, x1, y1, word, *_ in source[page_number].get_text("words")
+    ] or None]
+
+
+def _load_ocr(lang):
+    """Return process_image_array if PaddleOCR can be loaded, otherwise the reason it can't."""
+    try:
+        from ocr_processor import get_engine, process_image_array
+        get_engine(lang)  # Load the models here so their start-up is not timed as OCR
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    return process_image_array, None
+
+
+def benchmark_document(doc_info, work_dir, ocr=None, lang="en", render_options=None):
+    """
+    Time every pipeline stage on one document.
+
+    Args:
+        doc_info (dict): A corpus entry from build_corpus.
+        work_dir (str): Directory for the PDFs written by the pdf_write stage.
+        ocr (callable, optional): process_image_array, or None to skip OCR.
+            Without OCR, pdf_write places the words of the document's source
+            text PDF instead.
+        lang (str): OCR language.
+        render_options (dict, optional): Keyword arguments for rasterize_page.
+
+    Returns:
+        dict: Stage name mapped to a list of (seconds, pages) samples.
+    """
+    samples = {stage: [] for stage in STAGES}
+    path = doc_info["path"]
+    source = fitz.open(doc_info["source"]) if ocr is None else None
+
+    start = time.perf_counter()
+    is_pdf_text_based(path)
+    samples["detect"].append((time.perf_counter() - start, doc_info["pages"]))
+
+    with fitz.open(path) as doc:
+        for page in doc:
+            kind, _ = classify_page(page)
+
+            start = time.perf_counter()
+            image = rasterize_page(page, **(render_options or {}))
+            samples["render"].append((time.perf_counter() - start, 1))
+
+            if kind != PAGE_IMAGE:
+                continue
+            height, width = image.shape[:2]
+
+            if ocr is not None:
+                start = time.perf_counter()
+                ocr_results, width, height = ocr(image, lang=lang)
+                samples["ocr"].append((time.perf_counter() - start, 1))
+            else:
+                # Stand-in OCR output, the words of the page the image was made from
+                ocr_results = _source_words(source, page.number, width / page.rect.width,
+                                            height / page.rect.height)
+
+            start = time.perf_counter()
+            output_pdf = os.path.join(work_dir, f"{doc_info['name']}_page_{page.number + 1}.pdf")
+            create_positional_pdf_with_font_size(ocr_results, output_pdf, width, height)
+            samples["pdf_write"].append((time.perf_counter() - start, 1))
+
+    if source is not None:
+        source.close()
+
+    start = time.perf_counter()
+    text = extract_clean_text(path)
+    samples["extract_clean_text"].append((time.perf_counter() - start, doc_info["pages"]))
+
+    start = time.perf_counter()
+    clean_and_sort_text(text)
+    samples["clean_and_sort_text"].append((time.perf_counter() - start, doc_info["pages"]))
+
+    return samples
+
+
+def _git_commit():
+    """Return the current git commit of this checkout, or None outside a git work tree."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(corpus, repeat=1, ocr=True, lang="en", render_options=None):
+    """
+    Benchmark every document in the corpus.
+
+    Args:
+        corpus (list): Corpus entries from build_corpus.
+        repeat (int): Number of times to process each document.
+        ocr (bool): Run the OCR stage if PaddleOCR is available.
+        lang (str): OCR language.
+        render_options (dict, optional): Keyword arguments for rasterize_page.
+
+    Returns:
+        dict: The JSON-serialisable report.
+    """
+    ocr_func, ocr_skipped = _load_ocr(lang) if ocr else (None, "disabled with --no-ocr")
+    results = []
+    totals = {stage: [] for stage in STAGES}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for doc_info in corpus:
+            samples = {stage: [] for stage in STAGES}
+            for _ in range(repeat):
+                for stage, stage_samples in benchmark_document(doc_info, work_dir, ocr_func, lang,
+                                                               render_options).items():
+                    samples[stage].extend(stage_samples)
+                    totals[stage].extend(stage_samples)
+            results.append({
+                "name": doc_info["name"],
+                "kind": doc_info["kind"],
+                "pages": doc_info["pages"],
+                "dpi": doc_info["dpi"],
+                "stages": {stage: _summarise(stage_samples) for stage, stage_samples in samples.items()},
+            })
+            print(f"Benchmarked {doc_info['name']}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "lang": lang,
+            "render_options": render_options or {},
+            "ocr_skipped": ocr_skipped,
+        },
+        "documents": results,
+        "totals": {stage: _summarise(stage_samples) for stage, stage_samples in totals.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_reports(report, baseline, tolerance=0.1):
+    """
+    Find stages whose throughput dropped compared to a baseline report.
+
+    Args:
+        report (dict): The current report.
+        baseline (dict): An earlier report from the same options.
+        tolerance (float): Allowed fractional drop in pages/sec.
+
+    Returns:
+        list: Human-readable descriptions of the regressions.
+    """
+    regressions = []
+    baseline_docs = {doc["name"]: doc for doc in baseline.get("documents", [])}
+    for doc in report["documents"]:
+        old_doc = baseline_docs.get(doc["name"])
+        if old_doc is None:
+            continue
+        for stage, summary in doc["stages"].items():
+            new_rate = summary.get("pages_per_second")
+            old_rate = old_doc["stages"].get(stage, {}).get("pages_per_second")
+            if new_rate and old_rate and new_rate < old_rate * (1 - tolerance):
+                regressions.append(f"{doc['name']} {stage}: {old_rate} -> {new_rate} pages/sec "
+                                   f"({(new_rate / old_rate - 1) * 100:.1f}%)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PDF extraction pipeline on a synthetic corpus.")
+    parser.add_argument("--kinds", nargs="+", default=["text", "image", "mixed"], choices=["text", "image", "mixed"],
+                        help="document kinds to generate (default: all)")
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 10], help="page counts (default: 1 10)")
+    parser.add_argument("--dpi", nargs="+", type=int, default=[150], help="page image resolutions (default: 150)")
+    parser.add_argument("--repeat", type=int, default=1, help="times to process each document (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the corpus text (default: 0)")
+    parser.add_argument("--corpus-dir", help="keep the generated corpus in this directory")
+    parser.add_argument("--no-ocr", action="store_true", help="skip the OCR stage")
+    parser.add_argument("--lang", default="en", help="OCR language (default: en)")
+    parser.add_argument("--max-pixels", type=int, default=4_000_000, help="pixel budget per rendered page (default: 4000000)")
+    parser.add_argument("--output", "-o", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to check for throughput regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed fractional pages/sec drop against --baseline (default: 0.1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="pdf_bench_")
+    try:
+        print(f"Generating corpus in {corpus_dir}...", file=sys.stderr)
+        corpus = build_corpus(corpus_dir, args.kinds, args.pages, args.dpi, args.seed)
+        report = run_benchmark(corpus, repeat=args.repeat, ocr=not args.no_ocr, lang=args.lang,
+                               render_options={"max_pixels": args.max_pixels})
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    else:
+        print(report_json)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
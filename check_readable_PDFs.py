@@ -1,40 +1,85 @@
+import sys
+
 import fitz  # PyMuPDF
 
+# Page classifications returned by classify_page
+PAGE_TEXT = "text"    # Has a text layer and no images
+PAGE_MIXED = "mixed"  # Has a text layer and images
+PAGE_IMAGE = "image"  # No usable text layer, needs OCR
 
-def is_pdf_text_based(pdf_path, text_threshold=10):
+
+def classify_page(page, min_page_chars=1):
     """
-    Check if a PDF contains selectable text by verifying both embedded fonts and actual extracted text.
+    Classify a single page by whether it has a usable text layer.
 
     Parameters:
-        pdf_path (str): Path to the PDF file.
+        page (fitz.Page): The page to classify.
+        min_page_chars (int): Minimum number of text characters for the page to
+            count as having a text layer.
+
+    Returns:
+        tuple: Page kind (PAGE_TEXT, PAGE_MIXED or PAGE_IMAGE) and the page text.
+    """
+    text = page.get_text("text").strip()
+    if len(text) < min_page_chars:
+        return PAGE_IMAGE, text
+    if page.get_images():
+        return PAGE_MIXED, text
+    return PAGE_TEXT, text
+
+
+def detect_text_layer(doc, text_threshold=10):
+    """
+    Decide whether an open PDF contains selectable text, stopping as soon as it does.
+
+    Pages are read in order until more than text_threshold characters have been
+    seen, so a text-based document is usually decided after its first page.
+
+    Parameters:
+        doc (fitz.Document): Open PDF document.
         text_threshold (int): Minimum number of text characters to classify the PDF as text-based.
 
     Returns:
-        bool: True if the PDF contains selectable text, False if it's likely an image-based PDF.
+        tuple: True if the PDF contains selectable text, and the stripped text of
+        every page read so far (in page order).
     """
-    doc = fitz.open(pdf_path)
-    total_text = ""
-    has_fonts = False
+    page_texts = []
+    total_chars = 0
 
     for page in doc:
-        # Check if the page contains any fonts
-        if page.get_fonts():
-            has_fonts = True
+        text = page.get_text("text").strip()
+        page_texts.append(text)
+        total_chars += len(text)
+        if total_chars > text_threshold:
+            return True, page_texts
+
+    # No meaningful text, likely an image-based PDF
+    return False, page_texts
 
-        # Extract actual text from the page
-        total_text += page.get_text("text").strip()
 
-    # Condition 1: If the extracted text length is above the threshold, it's text-based
-    if len(total_text) > text_threshold:
-        return True
+def is_pdf_text_based(pdf_path, text_threshold=10):
+    """
+    Check if a PDF contains selectable text.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        text_threshold (int): Minimum number of text characters to classify the PDF as text-based.
 
-    # Condition 2: If fonts are present but no actual text is extracted, it may still be image-based
-    return False  # No meaningful text, likely an image-based PDF
+    Returns:
+        bool: True if the PDF contains selectable text, False if it's likely an image-based PDF.
+    """
+    with fitz.open(pdf_path) as doc:
+        return detect_text_layer(doc, text_threshold)[0]
 
 
-# Example usage
-pdf_path = r"C:\Users\ryans\PycharmProjects\paddler_final\ocr_processor\paddleocr_output_page_1_img_1.jpeg.pdf"
-if is_pdf_text_based(pdf_path):
-    print("The PDF contains selectable text.")
-else:
-    print("The PDF is likely image-based.")
+if __name__ == "__main__":
+    # Example usage: python check_readable_PDFs.py path/to/file.pdf
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else input("Enter the full path to your PDF file: ").strip()
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            kind, _ = classify_page(page)
+            print(f"Page {page.number + 1}: {kind}")
+        if detect_text_layer(doc)[0]:
+            print("The PDF contains selectable text.")
+        else:
+            print("The PDF is likely image-based.")
@@ -1,3 +1,25 @@
-from .ocr_utils import process_image, create_positional_pdf_with_font_size
-from .pdf_utils import extract_images_from_pdf
-from .image_utils import process_image_to_pdf
\ No newline at end of file
+from .ocr_utils import (
+    process_image,
+    process_image_array,
+    pixmap_to_array,
+    ocr_results_to_text,
+    create_positional_pdf_with_font_size,
+    crop_text_region,
+    sort_boxes,
+)
+from .pdf_utils import extract_images_from_pdf, iter_pdf_images
+from .image_utils import process_image_to_pdf
+from .pool import OCRWorkerPool
+from .cache import OCRCache, page_cache_key
+from .engine import get_ocr_engine, get_engine
+from .multilang import MultiLanguageOCR, classify_script
+from .batching import BatchedOCR
+from .two_tier import TwoTierOCR
+from .raster import rasterize_page, choose_zoom, deskew_image
+from .tiling import ocr_image_tiled, ocr_page_tiled, ocr_image_file_tiled, tile_grid, merge_tile_results
+from .layout import page_layout, regions_from_ocr, regions_from_words
+from .results import PageResult, as_page_result
+from .fingerprint import FingerprintIndex, page_phash, page_digest, image_phash, hamming_distance
+from .checkpoint import PageCheckpoint
+from .searchable import SearchablePDFWriter, add_text_layer
+from .metrics import NullMetrics, JSONLogMetrics, PrometheusMetrics, MultiMetrics, set_metrics, get_metrics
\ No newline at end of file
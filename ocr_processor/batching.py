@@ -0,0 +1,87 @@
+import numpy as np
+
+from .engine import get_ocr_engine
+from .metrics import span
+from .ocr_utils import crop_text_region, sort_boxes
+
+
+class BatchedOCR:
+    """
+    OCR that recognises text regions from many pages in shared batches.
+
+    Detection still runs once per page, but the cropped regions of all pages
+    are pooled before angle classification and recognition. PaddleOCR's
+    classifier and recogniser sort their input by aspect ratio and pad each
+    batch to its widest member, so a large pooled list gives full, evenly
+    padded batches instead of one small, mostly empty batch per page.
+
+    Parameters:
+        lang (str): OCR language.
+        use_angle_cls (bool): Whether to run the text angle classifier.
+        rec_batch_num (int): Number of regions per recognition batch.
+        cls_batch_num (int): Number of regions per angle classification batch.
+        drop_score (float): Regions scoring below this are dropped, as PaddleOCR does.
+        **options: Further PaddleOCR keyword arguments.
+    """
+
+    def __init__(self, lang='en', use_angle_cls=True, rec_batch_num=32, cls_batch_num=32, drop_score=0.5, **options):
+        if '+' in lang:
+            raise ValueError("Batched OCR supports a single language; use MultiLanguageOCR for mixed scripts.")
+        self.lang = lang
+        self.use_angle_cls = use_angle_cls
+        self.drop_score = drop_score
+        self.engine = get_ocr_engine(
+            lang, use_angle_cls, rec_batch_num=rec_batch_num, cls_batch_num=cls_batch_num, **options
+        )
+
+    def ocr_many(self, images, cls=True):
+        """
+        Run OCR on several images, batching recognition across all of them.
+
+        Parameters:
+            images (list): Page images as uint8 arrays.
+            cls (bool): Whether to run the angle classifier on the regions.
+
+        Returns:
+            list: One result per image in PaddleOCR's format,
+            [[[box, (text, confidence)], ...]] or [None] if no text was found.
+        """
+        boxes, crops, owners = [], [], []
+        for image_index, image in enumerate(images):
+            if image.ndim == 2:
+                image = np.repeat(image[:, :, np.newaxis], 3, axis=2)
+            with span("ocr_detect", lang=self.lang):
+                page_boxes, _ = self.engine.text_detector(image)
+            if page_boxes is None or len(page_boxes) == 0:
+                continue
+            for box in sort_boxes(page_boxes):
+                boxes.append(box)
+                crops.append(crop_text_region(image, box))
+                owners.append(image_index)
+
+        regions = [[] for _ in images]
+        if crops:
+            with span("ocr_recognize", lang=self.lang, regions=len(crops), pages=len(images)):
+                if cls and self.use_angle_cls:
+                    crops, _, _ = self.engine.text_classifier(crops)
+                rec_res, _ = self.engine.text_recognizer(crops)
+
+            # Scatter the pooled results back to their pages, keeping reading order
+            for box, (text, score), image_index in zip(boxes, rec_res, owners):
+                if score >= self.drop_score:
+                    regions[image_index].append([np.asarray(box).tolist(), (text, score)])
+
+        return [[page_regions or None] for page_regions in regions]
+
+    def ocr(self, image, cls=True):
+        """
+        Run OCR on one image, returning results in PaddleOCR's format.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+            cls (bool): Whether to run the angle classifier on the regions.
+
+        Returns:
+            list: [[[box, (text, confidence)], ...]], or [None] if no text was found.
+        """
+        return self.ocr_many([image], cls=cls)[0]
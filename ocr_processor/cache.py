@@ -0,0 +1,206 @@
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from .results import PageResult, as_page_result
+
+# Prefix of entries stored in the binary format; older entries are zlib-compressed JSON
+_BINARY_ENTRY = b"OCRB"
+
+
+@functools.lru_cache(maxsize=None)
+def _paddleocr_version():
+    """Return the installed PaddleOCR version, used to invalidate stale entries."""
+    # Read from package metadata so a cache lookup never has to import Paddle
+    try:
+        return importlib.metadata.version("paddleocr")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def page_cache_key(image, lang='en', use_angle_cls=True, model_version=None, variant=None):
+    """
+    Build a content-addressed cache key for a rendered page or image.
+
+    The key covers the pixel data and shape together with the OCR settings and
+    model version, so a change to any of them misses the cache.
+
+    Parameters:
+        image (numpy.ndarray): Decoded image as a uint8 array.
+        lang (str): OCR language.
+        use_angle_cls (bool): Whether the angle classifier is used.
+        model_version (str, optional): OCR model version. Defaults to the
+            installed PaddleOCR version.
+        variant (str, optional): Further settings that change the results,
+            e.g. TwoTierOCR.cache_variant.
+
+    Returns:
+        str: Hex digest identifying the page and OCR configuration.
+    """
+    if model_version is None:
+        model_version = _paddleocr_version()
+    digest = hashlib.sha256()
+    digest.update(f"{lang}|{int(use_angle_cls)}|{model_version}|{image.shape}|".encode())
+    if variant:
+        digest.update(f"{variant}|".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    An on-disk, size-bounded LRU cache of OCR results backed by SQLite.
+
+    Each entry holds the PaddleOCR result (boxes, text and confidences) and the
+    image size for one page, keyed by page_cache_key(). The cache is safe to
+    share between threads of one process.
+
+    Parameters:
+        path (str): Path to the SQLite database file.
+        max_bytes (int): Maximum total size of stored results. The least
+            recently used entries are evicted when it is exceeded.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_results_lru ON ocr_results (last_access)")
+        # Running total of the stored sizes, kept in step by put and _evict so inserts never scan the table
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0),"
+            " bytes INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_size (id, bytes)"
+            " SELECT 0, COALESCE(SUM(size), 0) FROM ocr_results"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Look up the OCR result stored for a key.
+
+        Parameters:
+            key (str): Key from page_cache_key().
+
+        Returns:
+            tuple or None: (ocr_results, width, height), or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        value = row[0]
+        if value[:len(_BINARY_ENTRY)] == _BINARY_ENTRY:
+            width, height = struct.unpack_from("<II", value, len(_BINARY_ENTRY))
+            result = PageResult.from_bytes(zlib.decompress(value[len(_BINARY_ENTRY) + 8:]))
+            return result.to_paddle(), width, height
+        entry = json.loads(zlib.decompress(value))
+        return entry["ocr_results"], entry["width"], entry["height"]
+
+    def put(self, key, ocr_results, width, height):
+        """
+        Store the OCR result for a key and evict old entries if over budget.
+
+        Parameters:
+            key (str): Key from page_cache_key().
+            ocr_results (list or PageResult): OCR results from PaddleOCR.
+            width (int): Image width.
+            height (int): Image height.
+        """
+        # Stored as a compressed PageResult, much smaller and faster to load than nested lists
+        value = b"".join((
+            _BINARY_ENTRY,
+            struct.pack("<II", int(width), int(height)),
+            zlib.compress(as_page_result(ocr_results).to_bytes()),
+        ))
+        with self._lock:
+            # Adjusted before the insert, in the same transaction, for an entry it replaces
+            self._conn.execute(
+                "UPDATE cache_size SET bytes = bytes + ?"
+                " - COALESCE((SELECT size FROM ocr_results WHERE key = ?), 0) WHERE id = 0",
+                (len(value), key),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        total = self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        while excess > 0:
+            rows = self._conn.execute("SELECT key, size FROM ocr_results ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                self._conn.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+                excess -= size
+                total -= size
+                self.evictions += 1
+        self._conn.execute("UPDATE cache_size SET bytes = ? WHERE id = 0", (max(total, 0),))
+
+    def stats(self):
+        """
+        Report cache counters and current size.
+
+        Returns:
+            dict: hits, misses, evictions, entries and bytes.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            size = self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+import os
+
+from .results import PageResult, as_page_result
+
+# Version of the checkpoint file layout, stored in its header line
+_FORMAT = 1
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Return the SHA-256 of a file, read in chunks.
+
+    Parameters:
+        path (str): Path to the file.
+        chunk_size (int): Bytes read at a time.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_record(record):
+    """Serialise a page record as one JSON line, with OCR results in PageResult's binary form."""
+    data = dict(record)
+    if data.get("ocr_results") is not None:
+        data["ocr_results"] = base64.b64encode(as_page_result(data["ocr_results"]).to_bytes()).decode("ascii")
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+def _decode_record(line):
+    """Load a page record written by _encode_record."""
+    data = json.loads(line)
+    if data.get("ocr_results") is not None:
+        data["ocr_results"] = PageResult.from_bytes(base64.b64decode(data["ocr_results"]))
+    data["key_values"] = [tuple(pair) for pair in data.get("key_values", [])]
+    return data
+
+
+class PageCheckpoint:
+    """
+    A durable, append-only record of the finished pages of one document.
+
+    Pages are stored as JSON lines after a header line that identifies the
+    document by its SHA-256 and the options it was processed with. A
+    checkpoint left by another file, or by a run with other options, is
+    discarded and started again. Each page is flushed and fsynced as it is
+    added, so a crash loses at most the page being written; a line cut short
+    by the crash is dropped when the checkpoint is reopened.
+
+    Parameters:
+        path (str): Path of the checkpoint file.
+        pdf_path (str): The document being processed.
+        options (dict, optional): JSON-serialisable processing options that
+            change the page results, e.g. the OCR language.
+    """
+
+    def __init__(self, path, pdf_path, options=None):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.header = {"checkpoint": _FORMAT, "sha256": file_digest(pdf_path), "options": options or {}}
+        self.pages = {}
+        if os.path.exists(path):
+            self._load()
+        else:
+            self._start()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _start(self):
+        """Write a new checkpoint holding only the header."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(self.header) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _load(self):
+        """Read the finished pages, dropping a torn last line and discarding a stale checkpoint."""
+        with open(self.path, "rb") as file:
+            lines = file.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if header != self.header or not lines[0].endswith(b"\n"):
+            print(f"Checkpoint {self.path} is for another file or other options; starting over.")
+            self._start()
+            return
+
+        valid_bytes = len(lines[0])
+        for line in lines[1:]:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = _decode_record(line.decode("utf-8"))
+            except ValueError:
+                break
+            self.pages[record["page"]] = record
+            valid_bytes += len(line)
+        if valid_bytes < sum(len(line) for line in lines):
+            # Cut the unfinished line off so new pages start on a line of their own
+            with open(self.path, "r+b") as file:
+                file.truncate(valid_bytes)
+
+    def __contains__(self, page_number):
+        return page_number in self.pages
+
+    def __len__(self):
+        return len(self.pages)
+
+    def get(self, page_number):
+        """
+        Return the stored record of a page finished by an earlier run.
+
+        Parameters:
+            page_number (int): Zero-based page number.
+
+        Returns:
+            dict or None: The page record, or None if the page is not finished.
+        """
+        return self.pages.get(page_number)
+
+    def add(self, record):
+        """
+        Durably store a finished page. Only the file keeps it, so memory use
+        does not grow with the document.
+
+        Parameters:
+            record (dict): Page record from process_bridge.iter_pdf_pages.
+        """
+        self._file.write(_encode_record(record))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """Close the checkpoint file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,78 @@
+import threading
+
+# Shared PaddleOCR instances, one per configuration, created on first use
+_engines = {}
+_engines_lock = threading.RLock()
+
+
+def get_ocr_engine(lang='en', use_angle_cls=True, use_gpu=False, **options):
+    """
+    Return the shared PaddleOCR engine for a configuration, creating it on first use.
+
+    PaddleOCR is only imported and its models only loaded when an engine is
+    first requested, so importing modules that may run OCR stays cheap and
+    documents that never reach OCR never load Paddle.
+
+    Parameters:
+        lang (str): OCR language, e.g. 'en' or 'fa'.
+        use_angle_cls (bool): Whether to load the text angle classifier.
+        use_gpu (bool): Whether to run on the GPU.
+        **options: Further PaddleOCR keyword arguments (e.g. cpu_threads).
+            They are part of the configuration key.
+
+    Returns:
+        PaddleOCR: The engine for this configuration.
+    """
+    key = (lang, use_angle_cls, use_gpu, tuple(sorted(options.items())))
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            from paddleocr import PaddleOCR
+
+            engine = PaddleOCR(use_angle_cls=use_angle_cls, lang=lang, use_gpu=use_gpu, **options)
+            _engines[key] = engine
+    return engine
+
+
+def loaded_engines():
+    """
+    List the configurations whose engines have been loaded in this process.
+
+    Returns:
+        list: Configuration keys of the loaded engines.
+    """
+    return list(_engines)
+
+
+def get_engine(lang='en', use_angle_cls=True, **options):
+    """
+    Return the shared OCR engine for a language specification.
+
+    A single language gives the PaddleOCR engine for it. Several languages
+    joined with '+' (e.g. 'en+fa') give a MultiLanguageOCR that detects text
+    once and recognises each region with the matching language.
+
+    Parameters:
+        lang (str): OCR language, or languages joined with '+'.
+        use_angle_cls (bool): Whether to use the text angle classifier.
+        **options: Further PaddleOCR keyword arguments.
+
+    Returns:
+        object: An engine with a PaddleOCR-compatible ocr(image, cls=True) method.
+    """
+    if '+' not in lang:
+        return get_ocr_engine(lang, use_angle_cls, **options)
+
+    key = ('multi', lang, use_angle_cls, tuple(sorted(options.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            from .multilang import MultiLanguageOCR
+
+            engine = MultiLanguageOCR(lang.split('+'), use_angle_cls=use_angle_cls, **options)
+            _engines[key] = engine
+    return engine
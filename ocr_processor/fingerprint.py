@@ -0,0 +1,260 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .results import PageResult, as_page_result
+
+DEFAULT_HASH_SIZE = 16        # 16 x 16 = 256-bit hashes
+DEFAULT_MAX_DISTANCE = 8      # Bits that may differ for two pages to count as the same
+_BANDS = 16                   # Hash split into 16-bit bands for lookup; supports distances up to 15
+
+
+@functools.lru_cache(maxsize=None)
+def _dct_matrix(n):
+    """Return the orthonormal DCT-II matrix of size n."""
+    k = np.arange(n)[:, np.newaxis]
+    matrix = np.cos(np.pi * (2 * np.arange(n) + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+def image_phash(gray, hash_size=DEFAULT_HASH_SIZE):
+    """
+    Compute the DCT perceptual hash of a square grayscale thumbnail.
+
+    The lowest hash_size x hash_size DCT frequencies are compared to their
+    median. Re-scanning, re-compressing or slightly changing contrast keeps
+    most bits the same, unlike a byte hash.
+
+    Parameters:
+        gray (numpy.ndarray): Square (n, n) grayscale image, n >= hash_size.
+        hash_size (int): Side of the kept frequency block; the hash has hash_size**2 bits.
+
+    Returns:
+        bytes: The hash.
+    """
+    dct = _dct_matrix(gray.shape[0])
+    frequencies = dct @ gray.astype(np.float32) @ dct.T
+    low = frequencies[:hash_size, :hash_size].ravel()
+    bits = low > np.median(low[1:])  # The DC term only reflects overall brightness
+    return np.packbits(bits).tobytes()
+
+
+def page_phash(page, hash_size=DEFAULT_HASH_SIZE, thumb_scale=4):
+    """
+    Compute the perceptual hash of a PDF page from a low-resolution thumbnail.
+
+    The page is rendered by MuPDF straight to a small grayscale square, which
+    is much cheaper than the full render needed for OCR.
+
+    Parameters:
+        page (fitz.Page): The page.
+        hash_size (int): Side of the kept frequency block.
+        thumb_scale (int): Thumbnail side as a multiple of hash_size.
+
+    Returns:
+        bytes: The hash.
+    """
+    side = hash_size * thumb_scale
+    matrix = fitz.Matrix(side / page.rect.width, side / page.rect.height)
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    # Rounding can make the render a pixel off; crop or pad to the exact square
+    square = np.full((side, side), 255, dtype=np.uint8)
+    square[:min(side, pix.height), :min(side, pix.width)] = gray[:side, :side]
+    return image_phash(square, hash_size)
+
+
+def page_digest(page):
+    """
+    Hash what a PDF page draws: its content streams and the raw bytes of its
+    images and form XObjects.
+
+    Two pages only share a digest if they draw the same thing, so unlike the
+    perceptual hash it tells apart two invoices printed from one template.
+    Nothing is rendered or decoded.
+
+    Parameters:
+        page (fitz.Page): The page.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    doc = page.parent
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}|{page.rotation}|".encode())
+    digest.update(page.read_contents())
+    xrefs = {image[0] for image in page.get_images(full=True)}
+    xrefs.update(xobject[0] for xobject in page.get_xobjects())
+    for xref in sorted(xrefs):
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+
+def hamming_distance(hash_a, hash_b):
+    """Return the number of differing bits between two hashes of the same length."""
+    return (int.from_bytes(hash_a, "big") ^ int.from_bytes(hash_b, "big")).bit_count()
+
+
+def _bands(phash):
+    """Split a hash into _BANDS integers for indexed lookup."""
+    step = len(phash) // _BANDS
+    return [int.from_bytes(phash[i * step:(i + 1) * step], "big") for i in range(_BANDS)]
+
+
+class FingerprintIndex:
+    """
+    A local index of page perceptual hashes and their OCR results, in SQLite.
+
+    Lookups find pages within a Hamming distance of a hash. Each hash is split
+    into 16 bands; two hashes that differ in fewer than 16 bits share at least
+    one band exactly, so only pages matching a band are compared bit by bit.
+
+    Pages of near-identical layout, such as two invoices printed from one
+    template, hash only a few bits apart. By default a perceptual match is
+    therefore only reused when the page's digest (see page_digest) is the
+    same too, i.e. for re-sent copies of a page. Pass confirm=False to also
+    reuse matches that merely look alike, such as re-scans of one sheet; that
+    is only safe where no two different documents share a layout.
+
+    Parameters:
+        path (str): Path to the SQLite database file.
+        max_distance (int): Largest Hamming distance that counts as a match (0-15).
+        confirm (bool): Require the page digests to be equal as well.
+    """
+
+    def __init__(self, path, max_distance=DEFAULT_MAX_DISTANCE, confirm=True):
+        if not 0 <= max_distance < _BANDS:
+            raise ValueError(f"max_distance must be between 0 and {_BANDS - 1}")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_distance = max_distance
+        self.confirm = confirm
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        band_columns = "".join(f" b{i} INTEGER NOT NULL," for i in range(_BANDS))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_fingerprints ("
+            " id INTEGER PRIMARY KEY,"
+            " phash BLOB NOT NULL,"
+            " digest TEXT,"
+            f"{band_columns}"
+            " document TEXT NOT NULL,"
+            " page INTEGER NOT NULL,"
+            " value BLOB NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(page_fingerprints)")]
+        if "digest" not in columns:
+            # Indexes from before digests were stored; their pages never confirm a match
+            self._conn.execute("ALTER TABLE page_fingerprints ADD COLUMN digest TEXT")
+        for i in range(_BANDS):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS page_fingerprints_b{i} ON page_fingerprints (b{i})")
+        self._conn.commit()
+
+    def _candidates(self, phash):
+        where = " OR ".join(f"b{i} = ?" for i in range(_BANDS))
+        return self._conn.execute(
+            f"SELECT phash, digest, document, page, value FROM page_fingerprints WHERE {where}", _bands(phash)
+        ).fetchall()
+
+    def lookup(self, phash, digest=None):
+        """
+        Find the closest indexed page within max_distance of a hash.
+
+        Parameters:
+            phash (bytes): Hash from page_phash().
+            digest (str, optional): Digest from page_digest(). With confirm,
+                only pages with this digest match, so without it nothing does.
+
+        Returns:
+            dict or None: document, page, distance, confirmed (whether the
+            digests are equal), ocr_results (a PageResult), width and height of
+            the match, or None if there is none.
+        """
+        with self._lock:
+            rows = self._candidates(phash)
+            best = None
+            for stored_hash, stored_digest, document, page, value in rows:
+                distance = hamming_distance(phash, stored_hash)
+                confirmed = digest is not None and stored_digest == digest
+                if distance > self.max_distance or (self.confirm and not confirmed):
+                    continue
+                # Confirmed matches first, then the closest
+                rank = (not confirmed, distance)
+                if best is None or rank < best[0]:
+                    best = (rank, document, page, value)
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        (unconfirmed, distance), document, page, value = best
+        width, height = struct.unpack_from("<II", value)
+        return {
+            "document": document,
+            "page": page,
+            "distance": distance,
+            "confirmed": not unconfirmed,
+            "ocr_results": PageResult.from_bytes(zlib.decompress(value[8:])),
+            "width": width,
+            "height": height,
+        }
+
+    def add(self, phash, document, page, ocr_results, width, height, digest=None):
+        """
+        Index a processed page with its OCR result.
+
+        Parameters:
+            phash (bytes): Hash from page_phash().
+            document (str): Document the page belongs to, e.g. its path.
+            page (int): Zero-based page number.
+            ocr_results (list or PageResult): OCR results for the page image.
+            width (int): Width of the OCR'd image.
+            height (int): Height of the OCR'd image.
+            digest (str, optional): Digest from page_digest(), needed for the
+                page to confirm later matches.
+        """
+        value = struct.pack("<II", int(width), int(height)) + zlib.compress(as_page_result(ocr_results).to_bytes())
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO page_fingerprints (phash, digest, {', '.join(f'b{i}' for i in range(_BANDS))},"
+                f" document, page, value, created) VALUES (?, ?, {', '.join('?' * _BANDS)}, ?, ?, ?, ?)",
+                [phash, digest, *_bands(phash), document, page, value, time.time()],
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Report lookup counters and index size.
+
+        Returns:
+            dict: hits, misses and pages.
+        """
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM page_fingerprints").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "pages": pages}
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
@@ -1,41 +1,134 @@
 import os
-from .ocr_utils import process_image, create_positional_pdf_with_font_size
-from .pdf_utils import extract_images_from_pdf
+from collections import deque
+import fitz  # PyMuPDF
+from .ocr_utils import process_image_array, create_positional_pdf_with_font_size
+from .pdf_utils import iter_pdf_images
+from .searchable import SearchablePDFWriter, add_text_layer
+from .metrics import span
 
-def process_image_to_pdf(input_path, output_pdf_path):
+def _load_images(input_path, min_size=32):
+    """
+    Decode the images to OCR from an image file or a PDF, one at a time.
+
+    Parameters:
+        input_path (str): Path to the input image or PDF file.
+        min_size (int): Embedded PDF images smaller than this are skipped.
+
+    Yields:
+        tuple: Image name, decoded image, and the image's xref in the PDF
+        (None for an image file).
+    """
+    if input_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
+        import cv2  # Imported here so the package loads without OpenCV's import cost
+
+        image = cv2.imread(input_path)
+        if image is None:
+            print(f"Error processing {input_path}: Unable to load image at {input_path}")
+            return
+        yield os.path.basename(input_path), image, None
+    else:
+        # Embedded images are decoded in memory; repeated logos and stamps are OCR'd once
+        yield from iter_pdf_images(input_path, min_size=min_size, with_xref=True)
+
+def _image_placements(doc):
+    """
+    Map each image xref in a PDF to where it is drawn.
+
+    Parameters:
+        doc (fitz.Document): The PDF.
+
+    Returns:
+        dict: xref mapped to a list of (page number, rect) placements.
+    """
+    placements = {}
+    for page in doc:
+        for xref in {img[0] for img in page.get_images()}:
+            for rect in page.get_image_rects(xref):
+                placements.setdefault(xref, []).append((page.number, rect))
+    return placements
+
+def process_image_to_pdf(input_path, output_pdf_path, pool=None, cache=None, lang='en', min_size=32,
+                         searchable=False, font="helv"):
     """
     Process an image or PDF to extract text and generate a PDF with positioned text.
 
     Parameters:
         input_path (str): Path to the input image or PDF file.
         output_pdf_path (str): Path to save the output PDF.
+        pool (OCRWorkerPool, optional): Worker pool to OCR images in parallel.
+            Images are OCR'd one by one in this process when omitted.
+        cache (OCRCache, optional): OCR result cache keyed by image content.
+        lang (str): OCR language, or languages joined with '+' (e.g. 'en+fa').
+            Ignored when a pool is given.
+        min_size (int): Embedded PDF images narrower or shorter than this many
+            pixels are skipped.
+        searchable (bool): Write a single searchable PDF to output_pdf_path:
+            the original pages (or the image) with the OCR text laid over them
+            invisibly. By default one text-only PDF is written per image.
+        font (str): Font for the searchable text layer, see add_text_layer.
     """
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Error: File not found at {input_path}")
 
-    temp_dir = "temp_images"
-    os.makedirs(temp_dir, exist_ok=True)
+    if not input_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.pdf')):
+        raise ValueError("Unsupported file format. Please provide an image or PDF file.")
 
-    image_paths = []
+    # Names and xrefs of decoded images whose OCR results have not been written yet, in order
+    submitted = deque()
 
-    if input_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-        image_paths.append(input_path)
-    elif input_path.lower().endswith('.pdf'):
-        image_paths.extend(extract_images_from_pdf(input_path, temp_dir))
+    def images():
+        for image_name, image, xref in _load_images(input_path, min_size):
+            submitted.append((image_name, xref))
+            yield image
+
+    def ocr_in_process():
+        for image in images():
+            try:
+                yield process_image_array(image, cache=cache, lang=lang)
+            except Exception as e:
+                yield e
+
+    # Every image yields its result or its exception, so submitted stays in step and one bad image is skipped
+    if pool is None:
+        ocr_outputs = ocr_in_process()
     else:
-        raise ValueError("Unsupported file format. Please provide an image or PDF file.")
+        # The pool decodes ahead by at most max_pending images and keeps input order
+        ocr_outputs = pool.imap(images(), cache=cache, return_exceptions=True)
 
-    for image_path in image_paths:
+    if searchable and input_path.lower().endswith('.pdf'):
+        # Every placement of every OCR'd image gets its text, in one incrementally saved copy
+        with SearchablePDFWriter(input_path, output_pdf_path, font=font) as writer:
+            placements = _image_placements(writer.doc)
+            for output in ocr_outputs:
+                image_name, xref = submitted.popleft()
+                if isinstance(output, Exception):
+                    print(f"Error processing {image_name}: {output}")
+                    continue
+                ocr_results, image_width, image_height, *_ = output
+                for page_number, rect in placements.get(xref, []):
+                    writer.add_page(page_number, ocr_results, image_width, image_height, clip=rect)
+        print(f"Searchable PDF saved to {output_pdf_path}")
+        return
+
+    for output in ocr_outputs:
+        image_name, _ = submitted.popleft()
+        if isinstance(output, Exception):
+            print(f"Error processing {image_name}: {output}")
+            continue
+        ocr_results, image_width, image_height, *_ = output
         try:
-            ocr_results, image_width, image_height = process_image(image_path)
-            output_path = os.path.splitext(output_pdf_path)[0] + f"_{os.path.basename(image_path)}.pdf"
-            create_positional_pdf_with_font_size(ocr_results, output_path, image_width, image_height)
+            if searchable:
+                # A page the size of the image, with the image itself under its invisible text
+                with span("pdf_write", image=image_name), fitz.open() as doc:
+                    page = doc.new_page(width=image_width, height=image_height)
+                    page.insert_image(page.rect, filename=input_path)
+                    add_text_layer(page, ocr_results, image_width, image_height, font=font)
+                    doc.save(output_pdf_path, garbage=1, deflate=True)
+                print(f"Searchable PDF saved to {output_pdf_path}")
+                continue
+            output_path = os.path.splitext(output_pdf_path)[0] + f"_{image_name}.pdf"
+            with span("pdf_write", image=image_name):
+                create_positional_pdf_with_font_size(ocr_results, output_path, image_width, image_height)
             print(f"OCR results with positions and estimated font sizes saved to {output_path}")
         except Exception as e:
-            print(f"Error processing {image_path}: {e}")
-
-    # Clean up temporary images
-    for img_path in image_paths:
-        if img_path != input_path:  # Don't delete the original input if it's an image
-            os.remove(img_path)
-    os.rmdir(temp_dir)
+            print(f"Error processing {image_name}: {e}")
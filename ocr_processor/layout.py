@@ -0,0 +1,239 @@
+import numpy as np
+
+from .results import as_page_result
+
+# Separator placed between cells of the same row in the layout text
+CELL_SEPARATOR = " | "
+
+
+def regions_from_ocr(ocr_results):
+    """
+    Convert PaddleOCR results to axis-aligned boxes and texts.
+
+    Parameters:
+        ocr_results (list or PageResult): OCR results from PaddleOCR.
+
+    Returns:
+        tuple: (n, 4) float32 array of x0, y0, x1, y1 boxes and the list of texts.
+    """
+    result = as_page_result(ocr_results).filter(non_empty=True)
+    return result.rects(), [text.strip() for text in result.texts]
+
+
+def regions_from_words(words):
+    """
+    Convert PyMuPDF words (page.get_text("words")) to boxes and texts.
+
+    Parameters:
+        words (list): Tuples of (x0, y0, x1, y1, word, block, line, word_no).
+
+    Returns:
+        tuple: (n, 4) float32 array of x0, y0, x1, y1 boxes and the list of texts.
+    """
+    words = [word for word in words if word[4].strip()]
+    if not words:
+        return np.empty((0, 4), dtype=np.float32), []
+    boxes = np.asarray([word[:4] for word in words], dtype=np.float32)
+    return boxes, [word[4].strip() for word in words]
+
+
+def group_lines(boxes, line_tolerance=0.5):
+    """
+    Assign each box to a text line.
+
+    Boxes are sorted by vertical centre and a new line starts wherever the gap
+    between consecutive centres exceeds line_tolerance times the median box height.
+
+    Parameters:
+        boxes (numpy.ndarray): (n, 4) array of x0, y0, x1, y1 boxes.
+        line_tolerance (float): Maximum centre gap, in box heights, within a line.
+
+    Returns:
+        numpy.ndarray: Line number of each box, numbered top to bottom.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    centers = (boxes[:, 1] + boxes[:, 3]) / 2
+    height = max(float(np.median(boxes[:, 3] - boxes[:, 1])), 1.0)
+    order = np.argsort(centers, kind="stable")
+    breaks = np.diff(centers[order]) > line_tolerance * height
+    labels = np.empty(len(boxes), dtype=np.int64)
+    labels[order] = np.concatenate([[0], np.cumsum(breaks)])
+    return labels
+
+
+def assign_columns(starts, tolerance):
+    """
+    Cluster cell start positions into columns.
+
+    Parameters:
+        starts (numpy.ndarray): x0 of every cell.
+        tolerance (float): Maximum distance between starts in the same column.
+
+    Returns:
+        numpy.ndarray: Column number of each cell, numbered left to right.
+    """
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    breaks = np.diff(starts[order]) > tolerance
+    columns = np.empty(len(starts), dtype=np.int64)
+    columns[order] = np.concatenate([[0], np.cumsum(breaks)])
+    return columns
+
+
+def reconstruct_layout(boxes, texts, line_tolerance=0.5, cell_gap=1.0):
+    """
+    Rebuild rows and cells in reading order from positioned text.
+
+    Boxes are grouped into lines, ordered left to right, and split into cells
+    wherever the horizontal gap between neighbours is wider than cell_gap box
+    heights.
+
+    Parameters:
+        boxes (numpy.ndarray): (n, 4) array of x0, y0, x1, y1 boxes.
+        texts (list): Text of each box.
+        line_tolerance (float): See group_lines.
+        cell_gap (float): Minimum gap, in box heights, that separates two cells.
+
+    Returns:
+        list: Rows top to bottom; each row is a list of (x0, x1, text) cells
+        ordered left to right.
+    """
+    if len(texts) == 0:
+        return []
+    boxes = np.asarray(boxes, dtype=np.float32)
+    height = max(float(np.median(boxes[:, 3] - boxes[:, 1])), 1.0)
+    lines = group_lines(boxes, line_tolerance)
+
+    order = np.lexsort((boxes[:, 0], lines))
+    ordered_lines = lines[order]
+    same_line = ordered_lines[1:] == ordered_lines[:-1]
+    gaps = boxes[order[1:], 0] - boxes[order[:-1], 2]
+    new_cell = np.concatenate([[True], ~same_line | (gaps > cell_gap * height)])
+    new_row = np.concatenate([[True], ~same_line])
+
+    # Cell extents: x0 of each cell's first box, x1 of its last box
+    cell_x0 = boxes[order[new_cell], 0]
+    last_in_cell = np.concatenate([new_cell[1:], [True]])
+    cell_x1 = boxes[order[last_in_cell], 2]
+
+    rows = []
+    cell_words = []
+    cell_id = -1
+    for position, index in enumerate(order):
+        if new_cell[position]:
+            if cell_words:
+                rows[-1].append((float(cell_x0[cell_id]), float(cell_x1[cell_id]), " ".join(cell_words)))
+                cell_words = []
+            cell_id += 1
+        if new_row[position]:
+            rows.append([])
+        cell_words.append(texts[index])
+    rows[-1].append((float(cell_x0[cell_id]), float(cell_x1[cell_id]), " ".join(cell_words)))
+    return rows
+
+
+def _cell_below(rows, row_index, x0, x1):
+    """Return the text of the first cell in the next row that overlaps [x0, x1] horizontally."""
+    if row_index + 1 >= len(rows):
+        return ""
+    for below_x0, below_x1, text in rows[row_index + 1]:
+        if below_x0 < x1 and below_x1 > x0:
+            return text
+    return ""
+
+
+def extract_key_values(rows):
+    """
+    Find label/value pairs in reconstructed rows.
+
+    A cell of the form "Label: value" gives a pair directly. A cell ending in a
+    colon takes the next cell in its row as the value, unless that cell is a
+    label too; otherwise it takes the overlapping cell in the next row.
+
+    Parameters:
+        rows (list): Rows from reconstruct_layout.
+
+    Returns:
+        list: (key, value) tuples in reading order.
+    """
+    pairs = []
+    for row_index, row in enumerate(rows):
+        for cell_index, (x0, x1, text) in enumerate(row):
+            key, colon, value = text.partition(":")
+            if not colon or not key.strip():
+                continue
+            value = value.strip()
+            if not value:
+                next_text = row[cell_index + 1][2] if cell_index + 1 < len(row) else ""
+                if next_text and not next_text.endswith(":"):
+                    value = next_text
+                else:
+                    value = _cell_below(rows, row_index, x0, x1)
+            if value and not value.endswith(":"):
+                pairs.append((key.strip(), value))
+    return pairs
+
+
+def layout_to_text(rows, column_tolerance=20.0):
+    """
+    Render reconstructed rows as compact text, one row per line.
+
+    Runs of consecutive multi-cell rows are treated as a table: their cell
+    starts are clustered into columns, and a row that skips a column gets an
+    empty cell there so values stay under the right header.
+
+    Parameters:
+        rows (list): Rows from reconstruct_layout.
+        column_tolerance (float): Maximum offset between cell starts in the
+            same table column, in page units.
+
+    Returns:
+        str: The layout text.
+    """
+    lines = []
+    row_index = 0
+    while row_index < len(rows):
+        if len(rows[row_index]) == 1:
+            lines.append(rows[row_index][0][2])
+            row_index += 1
+            continue
+
+        block_end = row_index
+        while block_end < len(rows) and len(rows[block_end]) > 1:
+            block_end += 1
+        block = rows[row_index:block_end]
+        starts = np.asarray([cell[0] for row in block for cell in row], dtype=np.float32)
+        columns = iter(assign_columns(starts, column_tolerance))
+        for row in block:
+            cells = []
+            previous_column = None
+            for cell in row:
+                column = int(next(columns))
+                if previous_column is not None:
+                    cells.extend([""] * max(0, column - previous_column - 1))
+                cells.append(cell[2])
+                previous_column = column
+            lines.append(CELL_SEPARATOR.join(cells))
+        row_index = block_end
+    return "\n".join(lines)
+
+
+def page_layout(boxes, texts, **options):
+    """
+    Reconstruct a page's layout and extract its label/value pairs.
+
+    Parameters:
+        boxes (numpy.ndarray): (n, 4) array of x0, y0, x1, y1 boxes.
+        texts (list): Text of each box.
+        **options: Passed to reconstruct_layout.
+
+    Returns:
+        tuple: Layout text and list of (key, value) pairs.
+    """
+    rows = reconstruct_layout(boxes, texts, **options)
+    if not rows:
+        return "", []
+    height = max(float(np.median(boxes[:, 3] - boxes[:, 1])), 1.0)
+    return layout_to_text(rows, column_tolerance=2.0 * height), extract_key_values(rows)
@@ -1,7 +1,20 @@
+import sys
 from ocr_processor import process_image_to_pdf
 
 if __name__ == "__main__":
-    input_path = r"C:\Users\ryans\Documents\Doc1111.pdf"  # Replace with your input image or PDF path
-    output_pdf_path = r"paddleocr_output.pdf"  # Replace with your desired output PDF path
-    process_image_to_pdf(input_path, output_pdf_path)
+    # Usage: python -m ocr_processor.main <input image or PDF> [output PDF path] [--searchable]
+    # --searchable writes one PDF of the original pages with an invisible OCR text layer
+    searchable = "--searchable" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--searchable"]
+    if not args:
+        input_path = input("Enter the full path to your image or PDF file: ").strip()
+    else:
+        input_path = args[0]
+    output_pdf_path = args[1] if len(args) > 1 else "paddleocr_output.pdf"
+
+    if not input_path:
+        print("No input path provided. Exiting.")
+        sys.exit(1)
+
+    process_image_to_pdf(input_path, output_pdf_path, searchable=searchable)
     print(f"OCR processing completed. Results saved to {output_pdf_path}")
\ No newline at end of file
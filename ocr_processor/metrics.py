@@ -0,0 +1,268 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Span names recorded by the pipeline
+SPAN_NAMES = (
+    "document",        # A whole document in batch_process
+    "open",            # Opening a PDF
+    "classify",        # Classifying a page as text, mixed or image
+    "fingerprint",     # Hashing a page and looking it up in the fingerprint index
+    "render",          # Rendering a page for OCR
+    "ocr",             # Full OCR of a page image
+    "ocr_detect",      # Text detection on a page image
+    "ocr_recognize",   # Angle classification and recognition of text regions
+    "pdf_write",       # Writing a positional OCR PDF
+    "extract",         # Text extraction from a PDF's text layer
+    "llm_request",     # A request to the language model
+)
+
+# Upper bounds, in seconds, of the Prometheus span duration buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class NullMetrics:
+    """
+    Metrics sink that discards everything. This is the default sink, so
+    instrumented code costs next to nothing until a real sink is installed.
+
+    Subclasses override record_span and record_count.
+    """
+
+    @contextmanager
+    def span(self, name, **fields):
+        """
+        Time the enclosed block and record it as a span.
+
+        Parameters:
+            name (str): Span name, e.g. 'render'.
+            **fields: Context such as document path or page number. A field
+                'error' holding the exception type name is added if the block raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self.record_span(name, time.perf_counter() - start, fields)
+
+    def record_span(self, name, seconds, fields):
+        """Record a finished span."""
+
+    def count(self, name, value=1, **fields):
+        """
+        Add to a counter.
+
+        Parameters:
+            name (str): Counter name, e.g. 'pages'.
+            value (float): Amount to add.
+            **fields: Context for the increment.
+        """
+        self.record_count(name, value, fields)
+
+    def record_count(self, name, value, fields):
+        """Record a counter increment."""
+
+    def flush(self):
+        """Write out anything the sink buffers, e.g. after each document."""
+
+
+class JSONLogMetrics(NullMetrics):
+    """
+    Metrics sink that writes every span and counter increment as one JSON line.
+
+    Parameters:
+        stream (file, optional): Text stream to write to. Defaults to stderr.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def _write(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            stream = self.stream or sys.stderr
+            stream.write(line + "\n")
+            stream.flush()
+
+    def record_span(self, name, seconds, fields):
+        self._write({"ts": time.time(), "type": "span", "name": name, "seconds": round(seconds, 6), **fields})
+
+    def record_count(self, name, value, fields):
+        self._write({"ts": time.time(), "type": "count", "name": name, "value": value, **fields})
+
+
+class PrometheusMetrics(NullMetrics):
+    """
+    Metrics sink that aggregates spans and counters in memory and renders
+    them in the Prometheus text exposition format.
+
+    Nothing is served over the network: call render() or write() and expose
+    the file through node_exporter's textfile collector, a push gateway, or
+    just read it.
+
+    Spans become histograms named <prefix>_<span>_seconds and counters become
+    <prefix>_<counter>_total. Only the fields listed in labels are kept as
+    Prometheus labels, so per-page context does not create a series per page.
+
+    Parameters:
+        prefix (str): Metric name prefix.
+        labels (tuple): Field names to keep as labels, e.g. ('kind', 'lang').
+        buckets (tuple): Histogram bucket upper bounds in seconds.
+        path (str, optional): File that flush() writes the metrics to.
+    """
+
+    def __init__(self, prefix="pdf_pipeline", labels=("error",), buckets=DEFAULT_BUCKETS, path=None):
+        self.path = path
+        self.prefix = prefix
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _label_key(self, fields):
+        return tuple((label, str(fields[label])) for label in self.labels if label in fields)
+
+    def record_span(self, name, seconds, fields):
+        key = (name, self._label_key(fields))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def record_count(self, name, value, fields):
+        key = (name, self._label_key(fields))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @staticmethod
+    def _format_labels(label_key, extra=()):
+        pairs = list(label_key) + list(extra)
+        if not pairs:
+            return ""
+        escaped = [(label, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                   for label, value in pairs]
+        return "{" + ",".join(f'{label}="{value}"' for label, value in escaped) + "}"
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        typed = set()
+        for (name, label_key), histogram in histograms:
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                lines.append(f"{metric}_bucket{self._format_labels(label_key, [('le', str(bound))])} {count}")
+            lines.append(f"{metric}_bucket{self._format_labels(label_key, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{metric}_sum{self._format_labels(label_key)} {histogram['sum']:.6f}")
+            lines.append(f"{metric}_count{self._format_labels(label_key)} {histogram['count']}")
+
+        for (name, label_key), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{self._format_labels(label_key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Write the rendered metrics to a file, replacing it atomically so a
+        collector never reads a half-written file.
+
+        Parameters:
+            path (str): Output path, e.g. a .prom file in the textfile collector directory.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        if self.path:
+            self.write(self.path)
+
+
+class MultiMetrics(NullMetrics):
+    """
+    Metrics sink that forwards everything to several sinks.
+
+    Parameters:
+        *sinks: The sinks to forward to.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def record_span(self, name, seconds, fields):
+        for sink in self.sinks:
+            sink.record_span(name, seconds, dict(fields))
+
+    def record_count(self, name, value, fields):
+        for sink in self.sinks:
+            sink.record_count(name, value, dict(fields))
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+
+_metrics = NullMetrics()
+
+
+def set_metrics(metrics):
+    """
+    Install the process-wide metrics sink.
+
+    OCR worker processes keep their own default sink; spans timed in the
+    parent (render, ocr wait, pdf_write) still cover pooled pages.
+
+    Parameters:
+        metrics (NullMetrics or None): The sink, or None to restore the no-op default.
+
+    Returns:
+        NullMetrics: The previously installed sink.
+    """
+    global _metrics
+    previous = _metrics
+    _metrics = metrics if metrics is not None else NullMetrics()
+    return previous
+
+
+def get_metrics():
+    """Return the process-wide metrics sink."""
+    return _metrics
+
+
+def span(name, **fields):
+    """Time a block with the process-wide sink, e.g. `with span('render', page=3):`."""
+    return _metrics.span(name, **fields)
+
+
+def count(name, value=1, **fields):
+    """Add to a counter on the process-wide sink."""
+    _metrics.count(name, value, **fields)
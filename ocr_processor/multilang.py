@@ -0,0 +1,159 @@
+import numpy as np
+
+from .engine import get_ocr_engine
+from .metrics import span
+from .ocr_utils import crop_text_region, sort_boxes
+
+# Languages written in Arabic script; every other language is treated as Latin script
+ARABIC_SCRIPT_LANGS = ('fa', 'ar', 'ur', 'ug')
+
+
+def classify_script(crop, secondary_peak_ratio=0.7):
+    """
+    Guess whether a cropped text line is in Arabic/Persian script or Latin script.
+
+    Arabic script joins letters along a shared baseline, so the row profile of
+    the ink has one dominant peak. Latin text has two similar peaks, at the top
+    of the x-height and at the baseline.
+
+    Parameters:
+        crop (numpy.ndarray): Cropped text region, grayscale or colour.
+        secondary_peak_ratio (float): The crop is classified as Arabic script
+            when no row away from the densest row reaches this fraction of its ink.
+
+    Returns:
+        str: 'arabic' or 'latin'.
+    """
+    gray = crop.mean(axis=2) if crop.ndim == 3 else crop.astype(np.float32)
+    low, high = gray.min(), gray.max()
+    if high - low < 16:
+        return 'latin'  # Too little contrast to tell; use the default recogniser
+
+    ink = gray < (low + high) / 2
+    if ink.mean() > 0.5:
+        ink = ~ink  # Light text on a dark background
+
+    profile = ink.sum(axis=1)
+    rows = np.nonzero(profile)[0]
+    if rows.size < 4:
+        return 'latin'
+
+    # Ignore the rows next to the peak, which belong to the same stroke
+    peak = int(profile.argmax())
+    margin = max(1, int((rows[-1] - rows[0] + 1) * 0.15))
+    others = np.concatenate([profile[:max(0, peak - margin)], profile[peak + margin + 1:]])
+    if others.size == 0 or others.max() < secondary_peak_ratio * profile[peak]:
+        return 'arabic'
+    return 'latin'
+
+
+class MultiLanguageOCR:
+    """
+    OCR for pages that mix Latin and Arabic-script (e.g. Persian) text.
+
+    Text detection runs once per page with the first language's engine. Each
+    detected region is then classified by script and recognised only by the
+    engine for that script, so mixed pages are not recognised twice in full.
+    Regions whose recognition confidence is below fallback_confidence are
+    retried with the other language and the better result is kept.
+
+    The ocr() method returns results in PaddleOCR's format, so this class can
+    be used anywhere a PaddleOCR engine is.
+
+    Parameters:
+        langs (list): Languages to use, e.g. ['en', 'fa']. The first Latin-script
+            and first Arabic-script language are used for their scripts.
+        use_angle_cls (bool): Whether to run the text angle classifier.
+        fallback_confidence (float): Confidence below which a region is retried
+            with the other language. Set to 0 to disable retries.
+        drop_score (float): Regions scoring below this are dropped, as PaddleOCR does.
+        **options: Further PaddleOCR keyword arguments for every engine.
+    """
+
+    def __init__(self, langs=('en', 'fa'), use_angle_cls=True, fallback_confidence=0.6, drop_score=0.5, **options):
+        self.langs = list(langs)
+        self.use_angle_cls = use_angle_cls
+        self.fallback_confidence = fallback_confidence
+        self.drop_score = drop_score
+        self.options = options
+        self.script_langs = {}
+        for lang in self.langs:
+            script = 'arabic' if lang in ARABIC_SCRIPT_LANGS else 'latin'
+            self.script_langs.setdefault(script, lang)
+
+    def _engine(self, lang):
+        return get_ocr_engine(lang, self.use_angle_cls, **self.options)
+
+    def _recognize(self, lang, crops):
+        """Recognise a list of crops with one language's recogniser."""
+        rec_res, _ = self._engine(lang).text_recognizer(crops)
+        return rec_res
+
+    def recognize(self, image, cls=True):
+        """
+        Detect and recognise text, reporting the language chosen for each region.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+            cls (bool): Whether to run the angle classifier on the regions.
+
+        Returns:
+            tuple: Regions as [box, (text, confidence)] in reading order, and
+            the language used for each region.
+        """
+        if image.ndim == 2:
+            image = np.repeat(image[:, :, np.newaxis], 3, axis=2)
+
+        detector = self._engine(self.langs[0])
+        with span("ocr_detect", lang=self.langs[0]):
+            boxes, _ = detector.text_detector(image)
+        if boxes is None or len(boxes) == 0:
+            return [], []
+        boxes = sort_boxes(boxes)
+
+        with span("ocr_recognize", lang="+".join(self.langs), regions=len(boxes)):
+            crops = [crop_text_region(image, box) for box in boxes]
+            if cls and self.use_angle_cls:
+                crops, _, _ = detector.text_classifier(crops)
+
+            # Send each crop only to the recogniser for its script
+            default_lang = self.langs[0]
+            crop_langs = [self.script_langs.get(classify_script(crop), default_lang) for crop in crops]
+            results = [None] * len(crops)
+            for lang in set(crop_langs):
+                indices = [i for i, crop_lang in enumerate(crop_langs) if crop_lang == lang]
+                for i, result in zip(indices, self._recognize(lang, [crops[i] for i in indices])):
+                    results[i] = tuple(result)
+
+            # Retry low-confidence regions with the other language
+            if self.fallback_confidence > 0 and len(self.script_langs) > 1:
+                for lang in self.script_langs.values():
+                    indices = [i for i, result in enumerate(results)
+                               if result[1] < self.fallback_confidence and crop_langs[i] != lang]
+                    if not indices:
+                        continue
+                    for i, result in zip(indices, self._recognize(lang, [crops[i] for i in indices])):
+                        if result[1] > results[i][1]:
+                            results[i] = tuple(result)
+                            crop_langs[i] = lang
+
+        regions, region_langs = [], []
+        for box, result, lang in zip(boxes, results, crop_langs):
+            if result[1] >= self.drop_score:
+                regions.append([np.asarray(box).tolist(), result])
+                region_langs.append(lang)
+        return regions, region_langs
+
+    def ocr(self, image, cls=True):
+        """
+        Run OCR on one image, returning results in PaddleOCR's format.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+            cls (bool): Whether to run the angle classifier on the regions.
+
+        Returns:
+            list: [[[box, (text, confidence)], ...]], or [None] if no text was found.
+        """
+        regions, _ = self.recognize(image, cls=cls)
+        return [regions or None]
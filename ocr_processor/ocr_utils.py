@@ -1,10 +1,10 @@
 import os
-import cv2
-from paddleocr import PaddleOCR
+import numpy as np
 from reportlab.pdfgen import canvas
-
-# Initialize PaddleOCR (supports multiple languages)
-ocr = PaddleOCR(use_angle_cls=True, lang='en')  # Change 'en' to 'fa' for Farsi if needed
+from .cache import page_cache_key
+from .engine import get_engine
+from .metrics import span
+from .results import PageResult, as_page_result
 
 def calculate_font_size(bbox):
     """
@@ -24,41 +24,205 @@ def create_positional_pdf_with_font_size(ocr_results, output_pdf, img_width, img
     Create a PDF with text positioned according to OCR results.
 
     Parameters:
-        ocr_results (list): OCR results from PaddleOCR.
+        ocr_results (list or PageResult): OCR results from PaddleOCR.
         output_pdf (str): Path to save the output PDF.
         img_width (int): Width of the source image.
         img_height (int): Height of the source image.
     """
     c = canvas.Canvas(output_pdf, pagesize=(img_width, img_height))
+    result = as_page_result(ocr_results)
 
-    for result in ocr_results[0]:
-        bbox, text = result[0], result[1][0]
+    # Font sizes and top-left corners for every region at once; the y-axis is inverted for PDF coordinates
+    font_sizes = result.font_sizes().tolist()
+    origins = result.flip_y(img_height)[:, 0].tolist()
 
+    for (x, y), text, font_size in zip(origins, result.texts, font_sizes):
         if not text.strip():
             continue
 
-        font_size = calculate_font_size(bbox)
-        x, y = bbox[0][0], img_height - bbox[0][1]  # Invert the y-axis for PDF coordinates
         c.setFont("Helvetica", font_size)
         c.setFillColorRGB(0, 0, 0)
         c.drawString(x, y, text)
 
     c.save()
 
-def process_image(image_path):
+class _PixmapSamples:
+    """Exposes a pixmap's samples to NumPy and keeps the pixmap alive while any array views them."""
+
+    def __init__(self, pix):
+        self.pix = pix
+        shape = (pix.height, pix.width) if pix.n == 1 else (pix.height, pix.width, pix.n)
+        strides = (pix.stride, 1) if pix.n == 1 else (pix.stride, pix.n, 1)
+        self.__array_interface__ = {
+            "version": 3,
+            "shape": shape,
+            "strides": strides,
+            "typestr": "|u1",
+            "data": (pix.samples_ptr, False),
+        }
+
+
+def pixmap_to_array(pix, copy=False):
+    """
+    Wrap a PyMuPDF pixmap as a NumPy image without copying its sample buffer.
+
+    By default the returned array is a view on the pixmap memory. The array
+    holds a reference to the pixmap, so the view stays valid after the caller
+    drops its own. Pass copy=True for an array that owns its data, e.g. to
+    hand it to another process.
+
+    Parameters:
+        pix (fitz.Pixmap): Rendered page or image pixmap.
+        copy (bool): Copy the samples into a buffer owned by the array.
+
+    Returns:
+        numpy.ndarray: uint8 array of shape (height, width, channels), or
+        (height, width) for single-channel (grayscale) pixmaps.
+    """
+    if not copy:
+        return np.asarray(_PixmapSamples(pix))
+    image = np.frombuffer(pix.samples, dtype=np.uint8)
+    if pix.n == 1:
+        return image.reshape(pix.height, pix.width)
+    return image.reshape(pix.height, pix.width, pix.n)
+
+def sort_boxes(boxes):
+    """
+    Sort text boxes top to bottom, then left to right within a line.
+
+    Matches the reading order PaddleOCR uses for its own results.
+
+    Parameters:
+        boxes (iterable): Boxes as 4x2 arrays of corner points.
+
+    Returns:
+        list: The boxes in reading order.
+    """
+    ordered = sorted(boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(ordered) - 1):
+        for j in range(i, -1, -1):
+            # Boxes whose tops are within 10px are treated as the same line
+            if abs(ordered[j + 1][0][1] - ordered[j][0][1]) < 10 and ordered[j + 1][0][0] < ordered[j][0][0]:
+                ordered[j], ordered[j + 1] = ordered[j + 1], ordered[j]
+            else:
+                break
+    return ordered
+
+def crop_text_region(image, box):
+    """
+    Cut a detected text region out of an image and straighten it.
+
+    Parameters:
+        image (numpy.ndarray): Source image.
+        box (array-like): The region's four corner points, clockwise from top-left.
+
+    Returns:
+        numpy.ndarray: The region warped to an upright rectangle. Tall, narrow
+        regions are rotated by 90 degrees so the text runs horizontally.
+    """
+    import cv2
+
+    points = np.asarray(box, dtype=np.float32)
+    crop_width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    crop_height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    target = np.float32([[0, 0], [crop_width, 0], [crop_width, crop_height], [0, crop_height]])
+    matrix = cv2.getPerspectiveTransform(points, target)
+    crop = cv2.warpPerspective(
+        image, matrix, (crop_width, crop_height),
+        borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC,
+    )
+    if crop.shape[0] >= crop.shape[1] * 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+def process_image_array(image, cache=None, lang='en', two_tier=None):
+    """
+    Run OCR on an image that is already decoded in memory.
+
+    Parameters:
+        image (numpy.ndarray): Image as an (height, width[, channels]) uint8 array.
+        cache (OCRCache, optional): Result cache checked before running OCR.
+        lang (str): OCR language, e.g. 'en' or 'fa'. Join languages with '+'
+            (e.g. 'en+fa') to pick the recogniser per text region.
+        two_tier (TwoTierOCR, optional): Run a fast first pass and a second
+            pass only on low-confidence regions or pages, instead of the
+            angle classifier on every region.
+
+    Returns:
+        tuple: OCR results, image width, image height. With two_tier, also
+        the page's two-tier statistics (None when the result was cached).
+    """
+    if cache is not None:
+        key = page_cache_key(image, lang, variant=two_tier.cache_variant if two_tier is not None else None)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached if two_tier is None else (*cached, None)
+
+    with span("ocr", lang=lang):
+        if two_tier is not None:
+            ocr_results, stats = two_tier.ocr_with_stats(image)
+        else:
+            ocr_results = get_engine(lang).ocr(image, cls=True)
+    image_height, image_width = image.shape[:2]
+
+    if cache is not None:
+        cache.put(key, ocr_results, image_width, image_height)
+    if two_tier is not None:
+        return ocr_results, image_width, image_height, stats
+    return ocr_results, image_width, image_height
+
+def ocr_results_to_text(ocr_results):
+    """
+    Join the recognised strings of an OCR result into a single line of text.
+
+    Whitespace is normalised the same way pdf_text_extractor.extract_clean_text
+    does, so the output matches what re-parsing a positional PDF used to give.
+
+    Parameters:
+        ocr_results (list or PageResult): OCR results from PaddleOCR.
+
+    Returns:
+        str: Recognised text in detection order, separated by single spaces.
+    """
+    if isinstance(ocr_results, PageResult):
+        raw_texts = ocr_results.texts
+    else:
+        raw_texts = [result[1][0] for result in ocr_results[0] or []]
+    texts = []
+    for raw_text in raw_texts:
+        text = ' '.join(raw_text.split())
+        if text:
+            texts.append(text)
+    return ' '.join(texts)
+
+def process_image(image_path, cache=None, lang='en', tiled=False, **tile_options):
     """
     Process a single image with OCR.
 
     Parameters:
         image_path (str): Path to the image.
+        cache (OCRCache, optional): Result cache checked before running OCR.
+        lang (str): OCR language, or languages joined with '+'.
+        tiled (bool): OCR the image in overlapping tiles at full resolution
+            instead of as one frame, for very large scans such as drawings.
+            The image is rendered tile by tile, though MuPDF still decodes
+            the source image once, see tiling.ocr_image_file_tiled.
+        **tile_options: With tiled=True, passed to tiling.ocr_page_tiled
+            (pool, tile_size, overlap, max_memory_mb, ...).
 
     Returns:
         tuple: OCR results, image width, image height.
     """
+    if tiled:
+        from .tiling import ocr_image_file_tiled
+
+        return ocr_image_file_tiled(image_path, cache=cache, lang=lang, **tile_options)
+
+    import cv2  # Imported here so the module loads without OpenCV's import cost
+
     image = cv2.imread(image_path)
     if image is None:
         raise ValueError(f"Error: Unable to load image at {image_path}")
 
-    ocr_results = ocr.ocr(image_path, cls=True)
-    image_height, image_width, _ = image.shape
-    return ocr_results, image_width, image_height
+    # Hand the decoded image to PaddleOCR instead of the path so it is not read twice
+    return process_image_array(image, cache=cache, lang=lang)
@@ -1,29 +1,93 @@
 import os
 import fitz  # PyMuPDF
+from .ocr_utils import pixmap_to_array
 
-def extract_images_from_pdf(pdf_path, temp_dir):
+# File extensions for the PDF image filters MuPDF reports
+_FILTER_EXTENSIONS = {
+    "DCTDecode": "jpeg",
+    "JPXDecode": "jpx",
+    "JBIG2Decode": "jb2",
+    "CCITTFaxDecode": "tiff",
+}
+
+def iter_pdf_images(pdf_path, min_size=32, dedupe=True, with_xref=False):
+    """
+    Decode the images embedded in a PDF, without writing them to disk.
+
+    Images are decoded by MuPDF straight into memory, converted to RGB or
+    grayscale without alpha, and yielded one at a time.
+
+    Parameters:
+        pdf_path (str): Path to the input PDF file.
+        min_size (int): Images narrower or shorter than this many pixels are
+            skipped, as they are too small to hold readable text.
+        dedupe (bool): Yield each image object (xref) only once, even if it is
+            placed on several pages, e.g. a logo or stamp.
+        with_xref (bool): Also yield each image's xref, to find where it is
+            placed with page.get_image_rects.
+
+    Yields:
+        tuple: (name, image), where name is "page_<n>_img_<m>.<ext>" and image
+        is a uint8 array of shape (height, width) or (height, width, 3);
+        (name, image, xref) with with_xref=True.
+    """
+    seen_xrefs = set()
+    with fitz.open(pdf_path) as doc:
+        for i in range(len(doc)):
+            for img_index, img in enumerate(doc.get_page_images(i)):
+                xref, width, height, image_filter = img[0], img[2], img[3], img[8]
+                if dedupe and xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
+                if width < min_size or height < min_size:
+                    continue
+
+                image_ext = _FILTER_EXTENSIONS.get(image_filter, "png")
+                name = f"page_{i+1}_img_{img_index+1}.{image_ext}"
+                try:
+                    pix = fitz.Pixmap(doc, xref)
+                    if pix.alpha:
+                        pix = fitz.Pixmap(pix, 0)  # Drop the alpha channel
+                    if pix.colorspace and pix.colorspace.n not in (1, 3):
+                        pix = fitz.Pixmap(fitz.csRGB, pix)  # CMYK and other colour spaces
+                    image = pixmap_to_array(pix, copy=True)
+                except Exception as e:
+                    # A corrupt image is skipped so the rest of the document is still decoded
+                    print(f"Error decoding {name}: {e}")
+                    continue
+                yield (name, image, xref) if with_xref else (name, image)
+
+def extract_images_from_pdf(pdf_path, temp_dir, dedupe=True):
     """
     Extract images from a PDF file and save them to a temporary directory.
 
+    Prefer iter_pdf_images, which decodes the images in memory.
+
     Parameters:
         pdf_path (str): Path to the input PDF file.
         temp_dir (str): Path to the temporary directory to save images.
+        dedupe (bool): Save each image object (xref) only once, even if it is
+            placed on several pages.
 
     Returns:
         list: List of paths to the extracted images.
     """
-    doc = fitz.open(pdf_path)
     image_paths = []
+    seen_xrefs = set()
 
-    for i in range(len(doc)):
-        for img_index, img in enumerate(doc.get_page_images(i)):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            image_path = os.path.join(temp_dir, f"page_{i+1}_img_{img_index+1}.{image_ext}")
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
-            image_paths.append(image_path)
+    with fitz.open(pdf_path) as doc:
+        for i in range(len(doc)):
+            for img_index, img in enumerate(doc.get_page_images(i)):
+                xref = img[0]
+                if dedupe and xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
+                base_image = doc.extract_image(xref)
+                image_bytes = base_image["image"]
+                image_ext = base_image["ext"]
+                image_path = os.path.join(temp_dir, f"page_{i+1}_img_{img_index+1}.{image_ext}")
+                with open(image_path, "wb") as img_file:
+                    img_file.write(image_bytes)
+                image_paths.append(image_path)
 
     return image_paths
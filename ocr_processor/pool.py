@@ -0,0 +1,205 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+from .cache import page_cache_key
+from .engine import get_engine
+from .two_tier import TwoTierOCR, two_tier_cache_variant
+
+# Environment variables read by the math libraries PaddleOCR and OpenCV sit on
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "FLAGS_paddle_num_threads")
+
+# The model owned by the current worker process (None in the parent)
+_worker_ocr = None
+
+
+def _init_worker(lang, use_angle_cls, threads, two_tier=None):
+    """
+    Load a PaddleOCR model once per worker process and cap its thread usage.
+
+    Parameters:
+        lang (str): OCR language, or languages joined with '+'.
+        use_angle_cls (bool): Whether to load the text angle classifier.
+        threads (int): Number of CPU threads the worker may use.
+        two_tier (dict, optional): TwoTierOCR options, to run two-tier OCR.
+    """
+    global _worker_ocr
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    import cv2
+
+    cv2.setNumThreads(threads)
+    if two_tier is not None:
+        _worker_ocr = TwoTierOCR(lang, cpu_threads=threads, show_log=False, **two_tier)
+    else:
+        _worker_ocr = get_engine(lang, use_angle_cls, cpu_threads=threads, show_log=False)
+
+
+def _ocr_in_worker(image):
+    """
+    Run OCR on one rendered page inside a worker process.
+
+    Parameters:
+        image (numpy.ndarray): Page image as an (height, width[, channels]) uint8 array.
+
+    Returns:
+        tuple: OCR results, image width, image height, and with two-tier OCR
+        the page's statistics.
+    """
+    image_height, image_width = image.shape[:2]
+    if isinstance(_worker_ocr, TwoTierOCR):
+        ocr_results, stats = _worker_ocr.ocr_with_stats(image)
+        return ocr_results, image_width, image_height, stats
+    ocr_results = _worker_ocr.ocr(image, cls=True)
+    return ocr_results, image_width, image_height
+
+
+class _WorkerContext(SpawnContext):
+    """Spawn context that remembers the processes it starts, so their pool can terminate them."""
+
+    def __init__(self):
+        self.processes = []
+
+    def Process(self, *args, **kwargs):
+        process = SpawnProcess(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+
+class OCRWorkerPool:
+    """
+    A persistent pool of processes, each holding a warm PaddleOCR model.
+
+    Create one pool and reuse it for every page and document so the model is
+    only loaded once per worker. Use it as a context manager or call close().
+
+    Parameters:
+        workers (int): Number of worker processes. Defaults to the CPU count.
+        threads_per_worker (int): CPU threads each worker may use, so that
+            workers * threads_per_worker does not oversubscribe the machine.
+        max_pending (int): Maximum number of pages queued or in flight at once.
+            Defaults to twice the worker count.
+        lang (str): OCR language, or languages joined with '+' (e.g. 'en+fa')
+            to pick the recogniser per text region.
+        use_angle_cls (bool): Whether to run the text angle classifier.
+        two_tier (dict, optional): TwoTierOCR options. Workers then run a fast
+            first pass and a second pass only where confidence is low, and
+            each result carries the page's two-tier statistics.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=1, max_pending=None, lang='en', use_angle_cls=True,
+                 two_tier=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.max_pending = max_pending or self.workers * 2
+        self.lang = lang
+        self.use_angle_cls = use_angle_cls
+        self.two_tier = two_tier
+        self._executor = self._start_executor()
+
+    def _start_executor(self):
+        # Spawn instead of fork so workers never inherit a half-initialised Paddle runtime
+        self._context = _WorkerContext()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self.lang, self.use_angle_cls, self.threads_per_worker, self.two_tier),
+        )
+
+    def submit(self, image, cache=None):
+        """
+        Queue a single page image for OCR.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+            cache (OCRCache, optional): Result cache checked before the page is
+                sent to a worker. A new result is stored in it once it is ready.
+
+        Returns:
+            concurrent.futures.Future: Resolves to (ocr_results, width, height),
+            plus the page's statistics with two-tier OCR (None when cached).
+        """
+        if cache is None:
+            return self._executor.submit(_ocr_in_worker, image)
+
+        variant = two_tier_cache_variant(self.two_tier) if self.two_tier is not None else None
+        key = page_cache_key(image, self.lang, self.use_angle_cls, variant=variant)
+        cached = cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached if self.two_tier is None else (*cached, None))
+            return future
+
+        def store(done):
+            if not done.cancelled() and done.exception() is None:
+                cache.put(key, *done.result()[:3])
+
+        future = self._executor.submit(_ocr_in_worker, image)
+        future.add_done_callback(store)
+        return future
+
+    def imap(self, images, cache=None, return_exceptions=False):
+        """
+        OCR an iterable of page images, yielding results in input order.
+
+        The iterable is consumed lazily and at most max_pending pages are held
+        at a time, so a long PDF is rendered only as fast as it is recognised.
+
+        Parameters:
+            images (iterable): Page images as uint8 arrays.
+            cache (OCRCache, optional): Result cache checked before a page is
+                sent to a worker. New results are stored in it.
+            return_exceptions (bool): Yield the exception of a page whose OCR
+                failed in its place instead of raising it, so the remaining
+                pages are still processed.
+
+        Yields:
+            tuple: OCR results, image width, image height for each page,
+            plus its statistics with two-tier OCR.
+        """
+        def result(future):
+            if not return_exceptions:
+                return future.result()
+            try:
+                return future.result()
+            except Exception as e:
+                return e
+
+        pending = deque()
+        try:
+            for image in images:
+                pending.append(self.submit(image, cache=cache))
+                if len(pending) >= self.max_pending:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def restart(self):
+        """
+        Kill the worker processes and start fresh ones, e.g. when a page has
+        hung a worker. Pages that were queued or in flight are lost: their
+        futures fail with BrokenProcessPool and must be submitted again, so
+        a pool that may be restarted should not be shared with other work
+        running at the same time.
+        """
+        # A running task cannot be cancelled, so the worker processes are terminated directly
+        for process in self._context.processes:
+            if process.is_alive():
+                process.terminate()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = self._start_executor()
+
+    def close(self):
+        """Shut the worker processes down."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,154 @@
+import numpy as np
+import fitz  # PyMuPDF
+
+from .ocr_utils import pixmap_to_array
+
+# Resolution used for pages with no embedded images (vector or text-only pages)
+DEFAULT_DPI = 144
+
+# Largest page image, in pixels, that is rendered for OCR
+DEFAULT_MAX_PIXELS = 4_000_000
+
+
+def embedded_image_dpi(page):
+    """
+    Estimate the resolution of the scanned images placed on a page.
+
+    Parameters:
+        page (fitz.Page): The page to inspect.
+
+    Returns:
+        float or None: Highest effective DPI of the page's images, or None if
+        the page has no images.
+    """
+    best = None
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        width_in = abs(x1 - x0) / 72
+        height_in = abs(y1 - y0) / 72
+        if width_in <= 0 or height_in <= 0:
+            continue
+        dpi = max(info["width"] / width_in, info["height"] / height_in)
+        best = dpi if best is None else max(best, dpi)
+    return best
+
+
+def choose_zoom(page, target_dpi=None, max_pixels=DEFAULT_MAX_PIXELS, min_dpi=96, max_dpi=400):
+    """
+    Pick a render scale for a page from its content and a pixel budget.
+
+    Scanned pages are rendered at the resolution of their embedded image, so
+    fine print keeps its detail and nothing is upsampled past the source. Other
+    pages use DEFAULT_DPI. The result is then capped so the rendered image
+    stays within max_pixels.
+
+    Parameters:
+        page (fitz.Page): The page to render.
+        target_dpi (float, optional): Fixed resolution to use instead of the
+            estimate.
+        max_pixels (int): Maximum width * height of the rendered image.
+        min_dpi (float): Lower bound for the chosen resolution.
+        max_dpi (float): Upper bound for the chosen resolution.
+
+    Returns:
+        float: Zoom factor relative to 72 DPI.
+    """
+    dpi = target_dpi or embedded_image_dpi(page) or DEFAULT_DPI
+    dpi = min(max(dpi, min_dpi), max_dpi)
+    zoom = dpi / 72
+
+    page_area = page.rect.width * page.rect.height
+    if page_area > 0 and page_area * zoom * zoom > max_pixels:
+        zoom = (max_pixels / page_area) ** 0.5
+    return zoom
+
+
+def estimate_skew(image, max_angle=5.0, step=0.25, work_width=800):
+    """
+    Estimate the skew of a scanned page from its row ink profile.
+
+    The page is shrunk and binarised, then rotated through candidate angles;
+    the angle at which text rows line up best gives the sharpest row profile.
+
+    Parameters:
+        image (numpy.ndarray): Page image, grayscale or colour.
+        max_angle (float): Largest skew, in degrees, to look for.
+        step (float): Angle resolution in degrees.
+        work_width (int): Width the page is shrunk to for the search.
+
+    Returns:
+        float: Rotation in degrees that straightens the page.
+    """
+    import cv2
+
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    scale = min(1.0, work_width / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    height, width = binary.shape
+    center = (width / 2, height / 2)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        matrix = cv2.getRotationMatrix2D(center, float(angle), 1.0)
+        rotated = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST)
+        score = float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew_image(image, min_angle=0.3, **options):
+    """
+    Rotate a scanned page so its text lines are horizontal.
+
+    Parameters:
+        image (numpy.ndarray): Page image, grayscale or colour.
+        min_angle (float): Skews smaller than this, in degrees, are left alone.
+        **options: Passed to estimate_skew.
+
+    Returns:
+        numpy.ndarray: The straightened image (the input itself if no rotation was needed).
+    """
+    import cv2
+
+    angle = estimate_skew(image, **options)
+    if abs(angle) < min_angle:
+        return image
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    border = 255 if image.ndim == 2 else (255,) * image.shape[2]
+    return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+
+
+def rasterize_page(page, zoom=None, grayscale=True, max_pixels=DEFAULT_MAX_PIXELS, target_dpi=None,
+                   deskew=False, copy=False):
+    """
+    Render a PDF page to an image ready for OCR.
+
+    Parameters:
+        page (fitz.Page): The page to render.
+        zoom (float, optional): Fixed render scale. Chosen with choose_zoom when omitted.
+        grayscale (bool): Render a single gray channel instead of RGB. Text
+            detection and recognition do not need colour, and the pixmap is a
+            third of the size.
+        max_pixels (int): Pixel budget passed to choose_zoom.
+        target_dpi (float, optional): Fixed resolution passed to choose_zoom.
+        deskew (bool): Straighten skewed scans before OCR.
+        copy (bool): Give the image its own buffer instead of a view on the
+            pixmap. Required when the image outlives the caller, e.g. for a pool.
+
+    Returns:
+        numpy.ndarray: (height, width) uint8 array for grayscale, otherwise
+        (height, width, 3).
+    """
+    if zoom is None:
+        zoom = choose_zoom(page, target_dpi=target_dpi, max_pixels=max_pixels)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    image = pixmap_to_array(pix, copy=copy)
+    if deskew:
+        # Rotation allocates a new image, so the result never refers to the pixmap
+        image = deskew_image(image)
+    return image
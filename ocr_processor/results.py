@@ -0,0 +1,215 @@
+import struct
+
+import numpy as np
+
+# Header of the binary format: magic, format version, region count, text byte count
+_MAGIC = b"OCRP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBII")
+
+
+class PageResult:
+    """
+    OCR result of one page, stored as a few flat arrays instead of nested lists.
+
+    PaddleOCR returns one list per region and one list per box corner. Here
+    the boxes are a single (n, 4, 2) float32 array of corner points (top-left,
+    top-right, bottom-right, bottom-left), the confidences a float32 array,
+    and the texts one UTF-8 buffer with an int32 offset array. Regions keep
+    the order they were given in.
+
+    The functions that take PaddleOCR results (create_positional_pdf_with_font_size,
+    ocr_results_to_text, regions_from_ocr, OCRCache.put) accept a PageResult as well.
+
+    Parameters:
+        boxes (numpy.ndarray): (n, 4, 2) corner points.
+        scores (numpy.ndarray): (n,) confidences.
+        text_data (bytes): The UTF-8 texts, concatenated.
+        text_offsets (numpy.ndarray): (n + 1,) int32 start offsets of each
+            text in text_data, followed by its total length.
+    """
+
+    __slots__ = ("boxes", "scores", "text_data", "text_offsets", "_texts")
+
+    def __init__(self, boxes, scores, text_data, text_offsets):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.text_data = bytes(text_data)
+        self.text_offsets = np.asarray(text_offsets, dtype=np.int32).reshape(-1)
+        if not len(self.boxes) == len(self.scores) == len(self.text_offsets) - 1:
+            raise ValueError("boxes, scores and text offsets describe different numbers of regions")
+        self._texts = None
+
+    @classmethod
+    def from_regions(cls, boxes, texts, scores):
+        """
+        Build a page result from boxes, texts and confidences.
+
+        Parameters:
+            boxes (array-like): (n, 4, 2) corner points.
+            texts (list): n strings.
+            scores (array-like): n confidences.
+
+        Returns:
+            PageResult: The page result.
+        """
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        result = cls(np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2), scores, b"".join(encoded), offsets)
+        result._texts = list(texts)
+        return result
+
+    @classmethod
+    def from_paddle(cls, ocr_results):
+        """
+        Convert PaddleOCR results for one image, [[[box, (text, confidence)], ...]]
+        or [None], to a page result.
+        """
+        regions = ocr_results[0] or []
+        if not regions:
+            return cls.empty()
+        return cls.from_regions(
+            [region[0] for region in regions],
+            [region[1][0] for region in regions],
+            [region[1][1] for region in regions],
+        )
+
+    @classmethod
+    def empty(cls):
+        """Return a page result without regions."""
+        return cls(np.empty((0, 4, 2), dtype=np.float32), np.empty(0, dtype=np.float32), b"",
+                   np.zeros(1, dtype=np.int32))
+
+    def to_paddle(self):
+        """Convert back to PaddleOCR's format, [[[box, (text, confidence)], ...]] or [None]."""
+        regions = [[box.tolist(), (text, float(score))]
+                   for box, text, score in zip(self.boxes, self.texts, self.scores)]
+        return [regions or None]
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __repr__(self):
+        return f"PageResult({len(self)} regions)"
+
+    def __eq__(self, other):
+        if not isinstance(other, PageResult):
+            return NotImplemented
+        return (self.text_data == other.text_data and np.array_equal(self.text_offsets, other.text_offsets)
+                and np.array_equal(self.boxes, other.boxes) and np.array_equal(self.scores, other.scores))
+
+    @property
+    def texts(self):
+        """The region texts, decoded on first use."""
+        if self._texts is None:
+            offsets = self.text_offsets.tolist()
+            self._texts = [self.text_data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        return self._texts
+
+    def rects(self):
+        """Return the axis-aligned bounds of each box as an (n, 4) x0, y0, x1, y1 array."""
+        return np.concatenate([self.boxes.min(axis=1), self.boxes.max(axis=1)], axis=1)
+
+    def heights(self):
+        """Return the height of each box, measured along its left edge."""
+        return np.abs(self.boxes[:, 3, 1] - self.boxes[:, 0, 1])
+
+    def font_sizes(self, minimum=8):
+        """Return the estimated font size of each region, as calculate_font_size does."""
+        return np.maximum(minimum, (self.heights() / 1.5).astype(np.int32))
+
+    def flip_y(self, height):
+        """Return the boxes with the y axis flipped for a page of the given height, e.g. for PDF coordinates."""
+        flipped = self.boxes.copy()
+        flipped[:, :, 1] = height - flipped[:, :, 1]
+        return flipped
+
+    def select(self, mask):
+        """
+        Return the regions picked by a boolean mask or index array, in their original order.
+
+        Parameters:
+            mask (array-like): Boolean mask of length n, or region indices.
+
+        Returns:
+            PageResult: The selected regions.
+        """
+        indices = np.arange(len(self))[np.asarray(mask)]
+        texts = self.texts
+        return PageResult.from_regions(self.boxes[indices], [texts[i] for i in indices], self.scores[indices])
+
+    def filter(self, min_score=None, non_empty=False):
+        """
+        Return the regions with at least min_score confidence and, with
+        non_empty=True, non-blank text.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_score is not None:
+            mask &= self.scores >= min_score
+        if non_empty:
+            mask &= np.array([bool(text.strip()) for text in self.texts], dtype=bool)
+        return self if mask.all() else self.select(mask)
+
+    def to_bytes(self):
+        """
+        Serialise to a compact little-endian binary form, for caches and IPC.
+
+        Returns:
+            bytes: Header, boxes, confidences, text offsets and text data.
+        """
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, len(self), len(self.text_data)),
+            self.boxes.astype("<f4", copy=False).tobytes(),
+            self.scores.astype("<f4", copy=False).tobytes(),
+            self.text_offsets.astype("<i4", copy=False).tobytes(),
+            self.text_data,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load a page result written by to_bytes.
+
+        Parameters:
+            data (bytes): The serialised page result.
+
+        Returns:
+            PageResult: The page result.
+
+        Raises:
+            ValueError: If the data is not a serialised page result.
+        """
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("Not a serialised PageResult")
+        magic, version, n, text_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a serialised PageResult, or an unsupported version")
+        offset = _HEADER.size
+        boxes = np.frombuffer(data, dtype="<f4", count=n * 8, offset=offset).reshape(n, 4, 2)
+        offset += n * 32
+        scores = np.frombuffer(data, dtype="<f4", count=n, offset=offset)
+        offset += n * 4
+        text_offsets = np.frombuffer(data, dtype="<i4", count=n + 1, offset=offset)
+        offset += (n + 1) * 4
+        return cls(boxes, scores, data[offset:offset + text_length], text_offsets)
+
+    def __reduce__(self):
+        # Pickle through the binary form, which is far smaller than the nested lists
+        return PageResult.from_bytes, (self.to_bytes(),)
+
+
+def as_page_result(ocr_results):
+    """
+    Return OCR results as a PageResult.
+
+    Parameters:
+        ocr_results (PageResult or list): A page result, or PaddleOCR results for one image.
+
+    Returns:
+        PageResult: The page result, unchanged if it already was one.
+    """
+    if isinstance(ocr_results, PageResult):
+        return ocr_results
+    return PageResult.from_paddle(ocr_results)
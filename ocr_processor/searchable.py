@@ -0,0 +1,161 @@
+import functools
+import os
+import shutil
+
+import fitz  # PyMuPDF
+
+from .metrics import span
+from .results import as_page_result
+
+
+@functools.lru_cache(maxsize=None)
+def _load_font(font):
+    """Load a font once per process, by built-in name (e.g. 'helv') or TrueType file path."""
+    if os.path.isfile(font):
+        return fitz.Font(fontfile=font)
+    return fitz.Font(font)
+
+
+def add_text_layer(page, ocr_results, image_width, image_height, clip=None, font="helv"):
+    """
+    Add OCR text to a PDF page as an invisible, searchable and selectable layer.
+
+    The page itself is left as it is. Each region's text is sized to fill its
+    box and written in one batch per page with a TextWriter.
+
+    Parameters:
+        page (fitz.Page): Page to add the text to.
+        ocr_results (list or PageResult): OCR results for an image of the page,
+            or of the part of it given by clip.
+        image_width (int): Width of the OCR'd image.
+        image_height (int): Height of the OCR'd image.
+        clip (fitz.Rect, optional): Area of the page the image shows, in page
+            coordinates as displayed. Defaults to the whole page.
+        font (str): Built-in PyMuPDF font name or path to a TrueType font.
+            The built-in 'helv' only covers Latin text; pass a font with the
+            right glyphs (e.g. for Persian) to make other scripts searchable.
+
+    Returns:
+        int: Number of text regions added.
+    """
+    result = as_page_result(ocr_results).filter(non_empty=True)
+    if not len(result):
+        return 0
+
+    clip = fitz.Rect(clip) if clip is not None else page.rect
+    scale_x, scale_y = clip.width / image_width, clip.height / image_height
+    rects = result.rects()
+    rects[:, [0, 2]] = rects[:, [0, 2]] * scale_x + clip.x0
+    rects[:, [1, 3]] = rects[:, [1, 3]] * scale_y + clip.y0
+
+    font = _load_font(font)
+    rotation = page.rotation
+    derotation = page.derotation_matrix
+    if rotation:
+        # Text is written on the unrotated page and turned to read upright once the rotation is back
+        page.set_rotation(0)
+
+    writer = fitz.TextWriter(page.rect)
+    for (x0, y0, x1, y1), text in zip(rects.tolist(), result.texts):
+        text = " ".join(text.split())
+        height = y1 - y0
+        if height <= 0 or x1 <= x0:
+            continue
+        # Size the text to the box height, then shrink it if it would overflow the box width
+        fontsize = height
+        text_length = font.text_length(text, fontsize=fontsize)
+        if text_length > 0:
+            fontsize = min(fontsize, fontsize * (x1 - x0) / text_length)
+        origin = fitz.Point(x0, y1 + font.descender * fontsize) * derotation  # Baseline above the descenders
+        if rotation:
+            line_writer = fitz.TextWriter(page.rect)
+            line_writer.append(origin, text, font=font, fontsize=fontsize)
+            line_writer.write_text(page, render_mode=3, morph=(origin, fitz.Matrix(rotation)))
+        else:
+            writer.append(origin, text, font=font, fontsize=fontsize)
+
+    if rotation:
+        page.set_rotation(rotation)
+    else:
+        writer.write_text(page, render_mode=3)  # Render mode 3 is invisible text
+    return len(result)
+
+
+class SearchablePDFWriter:
+    """
+    Turn a scanned PDF into a searchable one by adding the OCR text of its
+    pages as an invisible layer on top of the original page images.
+
+    The source is copied to the output path once and the text is then added
+    with incremental saves, appended to the file every flush_every pages, so
+    finished pages are streamed to disk and the original content is never
+    rewritten. Documents that cannot be saved incrementally (e.g. repaired on
+    open) are written in full when the writer is closed.
+
+    Parameters:
+        source_pdf (str): The original PDF.
+        output_pdf (str): Path of the searchable PDF. May be source_pdf itself
+            to add the text layer in place.
+        flush_every (int): Pages to add between incremental saves; 0 saves
+            only on close.
+        font (str): Font for the text layer, see add_text_layer.
+    """
+
+    def __init__(self, source_pdf, output_pdf, flush_every=25, font="helv"):
+        if os.path.abspath(source_pdf) != os.path.abspath(output_pdf):
+            output_dir = os.path.dirname(output_pdf)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            shutil.copyfile(source_pdf, output_pdf)
+        self.output_pdf = output_pdf
+        self.flush_every = flush_every
+        self.font = font
+        self.doc = fitz.open(output_pdf)
+        self.incremental = self.doc.can_save_incrementally()
+        self._unsaved = 0
+
+    def add_page(self, page_number, ocr_results, image_width, image_height, clip=None):
+        """
+        Add the OCR text of one page, or of one image on it.
+
+        Parameters:
+            page_number (int): Zero-based page number.
+            ocr_results (list or PageResult): OCR results for the image.
+            image_width (int): Width of the OCR'd image.
+            image_height (int): Height of the OCR'd image.
+            clip (fitz.Rect, optional): Area of the page the image shows.
+                Defaults to the whole page, as rendered by rasterize_page.
+        """
+        with span("pdf_write", document=self.output_pdf, page=page_number):
+            add_text_layer(self.doc[page_number], ocr_results, image_width, image_height, clip=clip, font=self.font)
+            self._unsaved += 1
+            if self.flush_every and self._unsaved >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        """Append the pages added since the last save to the output file."""
+        if self._unsaved and self.incremental:
+            self.doc.saveIncr()
+            self._unsaved = 0
+
+    def close(self):
+        """Save the remaining pages and close the document."""
+        if self.doc.is_closed:
+            return
+        try:
+            if self.incremental:
+                self.flush()
+            elif self._unsaved:
+                tmp_path = self.output_pdf + ".tmp"
+                self.doc.save(tmp_path, garbage=1, deflate=True)
+                self.doc.close()
+                os.replace(tmp_path, self.output_pdf)
+        finally:
+            if not self.doc.is_closed:
+                self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
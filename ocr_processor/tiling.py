@@ -0,0 +1,289 @@
+from collections import deque
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .ocr_utils import pixmap_to_array, process_image_array
+from .raster import DEFAULT_MAX_PIXELS, choose_zoom
+from .results import PageResult, as_page_result
+
+DEFAULT_TILE_SIZE = 1600      # Tile side in pixels; close to the size detection works at without downscaling
+DEFAULT_OVERLAP = 200         # Pixels shared by neighbouring tiles; should exceed the tallest line of text
+DEFAULT_MAX_MEMORY_MB = 256   # Tile images held at once, queued or being OCR'd
+_EDGE_MARGIN = 2              # Boxes this close to an inner tile edge may be cut off by it
+
+
+def _axis_tiles(length, tile_size, overlap):
+    """Split one axis into overlapping (start, end) spans of tile_size, the last one ending at length."""
+    if length <= tile_size:
+        return [(0, length)]
+    step = tile_size - overlap
+    starts = list(range(0, length - tile_size, step)) + [length - tile_size]
+    return [(start, start + tile_size) for start in starts]
+
+
+def tile_grid(width, height, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP):
+    """
+    Split an image into overlapping tiles, row by row.
+
+    Parameters:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        tile_size (int): Largest tile width and height.
+        overlap (int): Pixels shared by neighbouring tiles.
+
+    Returns:
+        list: (x0, y0, x1, y1) tile rectangles covering the image.
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError("overlap must be at least 0 and smaller than tile_size")
+    return [(x0, y0, x1, y1)
+            for y0, y1 in _axis_tiles(height, tile_size, overlap)
+            for x0, x1 in _axis_tiles(width, tile_size, overlap)]
+
+
+def merge_tile_results(tile_results, image_width, image_height, iou_threshold=0.5, containment=0.7):
+    """
+    Merge the OCR results of overlapping tiles into one result for the whole image.
+
+    Boxes are moved to image coordinates, then deduplicated greedily: whole
+    boxes come first, most confident first, then boxes cut off by an inner
+    tile edge, largest first. A box is dropped when its IoU with a kept box
+    reaches iou_threshold, or when either box covers at least containment of
+    the smaller one, so a word read whole in one tile and cut off in the next
+    is kept once. A line longer than the overlap is cut in both tiles; its two
+    parts are kept.
+
+    Parameters:
+        tile_results (iterable): ((x0, y0, x1, y1), ocr_results) for each tile,
+            with the results in tile coordinates.
+        image_width (int): Width of the whole image.
+        image_height (int): Height of the whole image.
+        iou_threshold (float): IoU at which two boxes are the same text.
+        containment (float): Share of the smaller box's area covered by the
+            other at which the two are the same text.
+
+    Returns:
+        PageResult: The regions of the whole image, top to bottom and then
+        left to right.
+    """
+    boxes, texts, scores, cut = [], [], [], []
+    for (x0, y0, x1, y1), ocr_results in tile_results:
+        result = as_page_result(ocr_results).filter(non_empty=True)
+        if not len(result):
+            continue
+        rects = result.rects()
+        cut.append(((rects[:, 0] <= _EDGE_MARGIN) & (x0 > 0))
+                   | ((rects[:, 1] <= _EDGE_MARGIN) & (y0 > 0))
+                   | ((rects[:, 2] >= x1 - x0 - _EDGE_MARGIN) & (x1 < image_width))
+                   | ((rects[:, 3] >= y1 - y0 - _EDGE_MARGIN) & (y1 < image_height)))
+        boxes.append(result.boxes + np.array([x0, y0], dtype=np.float32))
+        texts.extend(result.texts)
+        scores.append(result.scores)
+    if not boxes:
+        return PageResult.empty()
+
+    merged = PageResult.from_regions(np.concatenate(boxes), texts, np.concatenate(scores))
+    cut = np.concatenate(cut)
+    rects = merged.rects()
+    areas = np.maximum((rects[:, 2] - rects[:, 0]) * (rects[:, 3] - rects[:, 1]), 1e-6)
+
+    kept = []
+    for i in np.lexsort((np.where(cut, -areas, -merged.scores), cut)).tolist():
+        if kept:
+            other = rects[kept]
+            overlap_w = np.minimum(other[:, 2], rects[i, 2]) - np.maximum(other[:, 0], rects[i, 0])
+            overlap_h = np.minimum(other[:, 3], rects[i, 3]) - np.maximum(other[:, 1], rects[i, 1])
+            inter = np.clip(overlap_w, 0, None) * np.clip(overlap_h, 0, None)
+            iou = inter / (areas[kept] + areas[i] - inter)
+            covered = inter / np.minimum(areas[kept], areas[i])
+            if (iou >= iou_threshold).any() or (covered >= containment).any():
+                continue
+        kept.append(i)
+
+    kept.sort(key=lambda i: (rects[i, 1], rects[i, 0]))
+    return merged.select(np.array(kept, dtype=np.int64))
+
+
+def _max_in_flight(tile_size, channels, max_memory_mb, pool):
+    """Number of tiles that may be held at once within the memory ceiling."""
+    tile_bytes = tile_size * tile_size * channels
+    limit = max(1, int(max_memory_mb * 1024 * 1024 // tile_bytes))
+    return min(limit, pool.max_pending) if pool is not None else 1
+
+
+def ocr_tiles(tiles, pool=None, cache=None, lang='en', max_in_flight=1):
+    """
+    OCR tile images, in parallel on a worker pool when one is given.
+
+    Parameters:
+        tiles (iterable): (rect, image) pairs, consumed lazily.
+        pool (OCRWorkerPool, optional): Worker pool to OCR tiles on.
+        cache (OCRCache, optional): OCR result cache.
+        lang (str): OCR language. Ignored when a pool is given.
+        max_in_flight (int): Tiles submitted to the pool and not yet collected.
+
+    Yields:
+        tuple: rect and OCR results of each tile, in input order.
+    """
+    if pool is None:
+        for rect, image in tiles:
+            yield rect, process_image_array(image, cache=cache, lang=lang)[0]
+        return
+
+    pending = deque()
+    try:
+        for rect, image in tiles:
+            pending.append((rect, pool.submit(image, cache=cache)))
+            if len(pending) >= max_in_flight:
+                rect, future = pending.popleft()
+                yield rect, future.result()[0]
+        while pending:
+            rect, future = pending.popleft()
+            yield rect, future.result()[0]
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def ocr_image_tiled(image, pool=None, cache=None, lang='en', tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP,
+                    max_memory_mb=DEFAULT_MAX_MEMORY_MB, iou_threshold=0.5):
+    """
+    Run OCR on a large image that is already in memory, one overlapping tile at a time.
+
+    Parameters:
+        image (numpy.ndarray): Image as an (height, width[, channels]) uint8 array.
+        pool (OCRWorkerPool, optional): Worker pool to OCR tiles in parallel.
+        cache (OCRCache, optional): OCR result cache, checked per tile.
+        lang (str): OCR language. Ignored when a pool is given.
+        tile_size (int): Largest tile width and height.
+        overlap (int): Pixels shared by neighbouring tiles.
+        max_memory_mb (int): Ceiling on the tile images copied for the pool at once.
+        iou_threshold (float): IoU at which boxes from two tiles are merged.
+
+    Returns:
+        tuple: OCR results in PaddleOCR's format, image width, image height.
+    """
+    image_height, image_width = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+    rects = tile_grid(image_width, image_height, tile_size, overlap)
+    # Tiles are views on the image; the pool pickles each one when it is submitted
+    tiles = ((rect, image[rect[1]:rect[3], rect[0]:rect[2]]) for rect in rects)
+    results = ocr_tiles(tiles, pool=pool, cache=cache, lang=lang,
+                        max_in_flight=_max_in_flight(tile_size, channels, max_memory_mb, pool))
+    merged = merge_tile_results(results, image_width, image_height, iou_threshold=iou_threshold)
+    return merged.to_paddle(), image_width, image_height
+
+
+def page_pixel_size(page, zoom):
+    """Return the (width, height) in pixels of a page rendered at a zoom."""
+    rect = page.rect * fitz.Matrix(zoom, zoom)
+    return round(rect.width), round(rect.height)
+
+
+def iter_page_tiles(page, zoom, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, grayscale=True, copy=False):
+    """
+    Render a page tile by tile, so the whole page is never held as one image.
+
+    Parameters:
+        page (fitz.Page): The page, from a PDF or an image file opened with PyMuPDF.
+        zoom (float): Render scale relative to 72 DPI.
+        tile_size (int): Largest tile width and height.
+        overlap (int): Pixels shared by neighbouring tiles.
+        grayscale (bool): Render a single gray channel instead of RGB.
+        copy (bool): Give each tile its own buffer instead of a view on its
+            pixmap. Required when tiles outlive the loop, e.g. for a pool.
+
+    Yields:
+        tuple: (x0, y0, x1, y1) of the tile in the full page image, and the tile image.
+    """
+    width, height = page_pixel_size(page, zoom)
+    matrix = fitz.Matrix(zoom, zoom)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    for x0, y0, x1, y1 in tile_grid(width, height, tile_size, overlap):
+        # The clip is in displayed page coordinates, so rotated pages tile like the full render
+        pix = page.get_pixmap(matrix=matrix, clip=fitz.Rect(x0, y0, x1, y1) / zoom,
+                              colorspace=colorspace, alpha=False)
+        yield (pix.x, pix.y, pix.x + pix.width, pix.y + pix.height), pixmap_to_array(pix, copy=copy)
+
+
+def needs_tiling(page, max_pixels=DEFAULT_MAX_PIXELS, target_dpi=None):
+    """
+    Tell whether a page at its full resolution is larger than a pixel budget,
+    so rasterize_page would have to scale it down.
+
+    Parameters:
+        page (fitz.Page): The page.
+        max_pixels (int): Pixel budget of a single render.
+        target_dpi (float, optional): Fixed resolution instead of the page's own.
+
+    Returns:
+        bool: True if the page should be OCR'd in tiles.
+    """
+    width, height = page_pixel_size(page, choose_zoom(page, target_dpi=target_dpi, max_pixels=float("inf")))
+    return width * height > max_pixels
+
+
+def ocr_page_tiled(page, zoom=None, target_dpi=None, pool=None, cache=None, lang='en', grayscale=True,
+                   tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                   iou_threshold=0.5):
+    """
+    Run OCR on a page at full resolution, rendering and recognising it tile by tile.
+
+    The tile images in flight are bounded by max_memory_mb, and small text
+    keeps the detail a single downscaled render would lose. For vector pages
+    such as drawings, that bounds peak memory. An embedded scan is still
+    decoded whole by MuPDF (once, then kept in its store), so for scanned
+    pages only the rendered frames are bounded, not the source image.
+
+    Parameters:
+        page (fitz.Page): The page.
+        zoom (float, optional): Render scale. Defaults to choose_zoom without
+            a pixel budget: the resolution of the page's scanned image.
+        target_dpi (float, optional): Fixed resolution passed to choose_zoom.
+        pool (OCRWorkerPool, optional): Worker pool to OCR tiles in parallel.
+        cache (OCRCache, optional): OCR result cache, checked per tile.
+        lang (str): OCR language. Ignored when a pool is given.
+        grayscale (bool): Render a single gray channel instead of RGB.
+        tile_size (int): Largest tile width and height.
+        overlap (int): Pixels shared by neighbouring tiles.
+        max_memory_mb (int): Ceiling on the tile images held at once. It does
+            not cover the decoded source image of a scanned page.
+        iou_threshold (float): IoU at which boxes from two tiles are merged.
+
+    Returns:
+        tuple: OCR results in PaddleOCR's format, and the width and height of
+        the full page image the boxes refer to.
+    """
+    if zoom is None:
+        zoom = choose_zoom(page, target_dpi=target_dpi, max_pixels=float("inf"))
+    width, height = page_pixel_size(page, zoom)
+    tiles = iter_page_tiles(page, zoom, tile_size, overlap, grayscale=grayscale, copy=pool is not None)
+    results = ocr_tiles(tiles, pool=pool, cache=cache, lang=lang,
+                        max_in_flight=_max_in_flight(tile_size, 1 if grayscale else 3, max_memory_mb, pool))
+    merged = merge_tile_results(results, width, height, iou_threshold=iou_threshold)
+    return merged.to_paddle(), width, height
+
+
+def ocr_image_file_tiled(image_path, **options):
+    """
+    Run tiled OCR on an image file at its native resolution.
+
+    The file is opened as a one-page document and rendered tile by tile, so
+    no full-resolution page array or pool copy of it is made. MuPDF still
+    decodes the source image whole, so max_memory_mb bounds the tiles but
+    not that decode; only vector PDF pages are bounded end to end.
+
+    Parameters:
+        image_path (str): Path to the image.
+        **options: Passed to ocr_page_tiled (pool, cache, lang, tile_size, ...).
+
+    Returns:
+        tuple: OCR results in PaddleOCR's format, image width, image height.
+    """
+    with fitz.open(image_path) as doc:
+        page = doc[0]
+        info = page.get_image_info()
+        # The image fills the page; render it at one pixel per image pixel
+        zoom = info[0]["width"] / page.rect.width if info else 1.0
+        return ocr_page_tiled(page, zoom=zoom, **options)
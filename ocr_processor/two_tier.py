@@ -0,0 +1,166 @@
+import json
+import time
+
+import numpy as np
+
+from .engine import get_ocr_engine
+from .metrics import span
+from .ocr_utils import crop_text_region, sort_boxes
+
+# Default thresholds of TwoTierOCR, filled in for cache keys so equal settings share entries
+_DEFAULTS = {"min_confidence": 0.85, "page_confidence": 0.6, "first_pass_scale": 1.0, "drop_score": 0.5}
+
+def two_tier_cache_variant(options):
+    """
+    Describe two-tier OCR settings for page_cache_key, so their results are
+    cached apart from single-pass OCR and from other thresholds.
+
+    Parameters:
+        options (dict): TwoTierOCR keyword arguments.
+
+    Returns:
+        str: The cache key variant.
+    """
+    return "two-tier|" + json.dumps({**_DEFAULTS, **options}, sort_keys=True)
+
+
+class TwoTierOCR:
+    """
+    OCR that only spends the angle classifier and full resolution where they help.
+
+    The first pass detects and recognises text without angle classification,
+    optionally on a downscaled image. Regions recognised with a confidence
+    below min_confidence are then cut from the full-resolution image, run
+    through the angle classifier and recognised again, keeping whichever
+    reading is more confident. A page whose mean first-pass confidence is
+    below page_confidence (or where nothing was found) is OCR'd again in full
+    at full resolution with angle classification, since a low-resolution
+    detection may have missed its text altogether.
+
+    Most pages are upright and clean, so most regions never reach the second
+    tier. The ocr() method returns results in PaddleOCR's format, so this
+    class can be used anywhere a PaddleOCR engine is; ocr_with_stats() also
+    reports how much work the second tier took.
+
+    Parameters:
+        lang (str): OCR language.
+        min_confidence (float): Regions below this confidence get a second pass.
+        page_confidence (float): Pages whose mean first-pass confidence is
+            below this are OCR'd again in full. 0 disables page reruns.
+        first_pass_scale (float): Scale of the image for the first pass, e.g.
+            0.5 for half resolution. 1 keeps the full resolution.
+        drop_score (float): Regions scoring below this after both passes are
+            dropped, as PaddleOCR does.
+        **options: Further PaddleOCR keyword arguments.
+    """
+
+    def __init__(self, lang='en', min_confidence=_DEFAULTS["min_confidence"],
+                 page_confidence=_DEFAULTS["page_confidence"], first_pass_scale=_DEFAULTS["first_pass_scale"],
+                 drop_score=_DEFAULTS["drop_score"], **options):
+        if '+' in lang:
+            raise ValueError("Two-tier OCR supports a single language; use MultiLanguageOCR for mixed scripts.")
+        if not 0 < first_pass_scale <= 1:
+            raise ValueError("first_pass_scale must be greater than 0 and at most 1")
+        self.lang = lang
+        self.min_confidence = min_confidence
+        self.page_confidence = page_confidence
+        self.first_pass_scale = first_pass_scale
+        self.drop_score = drop_score
+        self.options = options
+        self.cache_variant = two_tier_cache_variant({
+            "min_confidence": min_confidence, "page_confidence": page_confidence,
+            "first_pass_scale": first_pass_scale, "drop_score": drop_score,
+        })
+
+    @property
+    def engine(self):
+        # Loaded on first use, with the classifier for the second pass even though the first pass skips it
+        return get_ocr_engine(self.lang, use_angle_cls=True, **self.options)
+
+    def _recognize(self, image, cls):
+        """Detect and recognise every region of an image, keeping low scores. Returns boxes and (text, score) pairs."""
+        with span("ocr_detect", lang=self.lang):
+            boxes, _ = self.engine.text_detector(image)
+        if boxes is None or len(boxes) == 0:
+            return [], []
+        boxes = sort_boxes(boxes)
+        with span("ocr_recognize", lang=self.lang, regions=len(boxes)):
+            crops = [crop_text_region(image, box) for box in boxes]
+            if cls:
+                crops, _, _ = self.engine.text_classifier(crops)
+            results, _ = self.engine.text_recognizer(crops)
+        return [np.asarray(box, dtype=np.float32) for box in boxes], [tuple(result) for result in results]
+
+    def ocr_with_stats(self, image):
+        """
+        Run two-tier OCR on one image.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+
+        Returns:
+            tuple: Results in PaddleOCR's format, [[[box, (text, confidence)], ...]]
+            or [None], and a dict of statistics: regions, first_pass_confidence,
+            low_confidence_regions, improved_regions, page_rerun,
+            first_pass_seconds, second_pass_seconds and confidence (the final
+            mean confidence).
+        """
+        if image.ndim == 2:
+            image = np.repeat(image[:, :, np.newaxis], 3, axis=2)
+
+        start = time.perf_counter()
+        first_image = image
+        if self.first_pass_scale < 1:
+            import cv2
+
+            first_image = cv2.resize(image, None, fx=self.first_pass_scale, fy=self.first_pass_scale,
+                                     interpolation=cv2.INTER_AREA)
+        boxes, results = self._recognize(first_image, cls=False)
+        boxes = [box / self.first_pass_scale for box in boxes]
+        scores = [score for _, score in results]
+        first_confidence = float(np.mean(scores)) if scores else 0.0
+        stats = {
+            "regions": len(results),
+            "first_pass_confidence": round(first_confidence, 4),
+            "low_confidence_regions": 0,
+            "improved_regions": 0,
+            "page_rerun": False,
+            "first_pass_seconds": round(time.perf_counter() - start, 4),
+        }
+
+        start = time.perf_counter()
+        if self.page_confidence > 0 and first_confidence < self.page_confidence:
+            stats["page_rerun"] = True
+            boxes, results = self._recognize(image, cls=True)
+            stats["regions"] = len(results)
+        else:
+            low = [i for i, (_, score) in enumerate(results) if score < self.min_confidence]
+            stats["low_confidence_regions"] = len(low)
+            if low:
+                with span("ocr_recognize", lang=self.lang, regions=len(low)):
+                    crops = [crop_text_region(image, boxes[i]) for i in low]
+                    crops, _, _ = self.engine.text_classifier(crops)
+                    second, _ = self.engine.text_recognizer(crops)
+                for i, result in zip(low, second):
+                    if result[1] > results[i][1]:
+                        results[i] = tuple(result)
+                        stats["improved_regions"] += 1
+        stats["second_pass_seconds"] = round(time.perf_counter() - start, 4)
+
+        regions = [[box.tolist(), result] for box, result in zip(boxes, results) if result[1] >= self.drop_score]
+        stats["confidence"] = round(float(np.mean([result[1] for _, result in regions])), 4) if regions else 0.0
+        return [regions or None], stats
+
+    def ocr(self, image, cls=True):
+        """
+        Run two-tier OCR on one image, returning results in PaddleOCR's format.
+
+        Parameters:
+            image (numpy.ndarray): Page image as a uint8 array.
+            cls (bool): Accepted for compatibility; the second tier decides
+                where the angle classifier runs.
+
+        Returns:
+            list: [[[box, (text, confidence)], ...]], or [None] if no text was found.
+        """
+        return self.ocr_with_stats(image)[0]
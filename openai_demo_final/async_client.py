@@ -0,0 +1,206 @@
+import asyncio
+import random
+
+import openai
+from openai import AsyncOpenAI
+
+import config
+from tokens import chunk_text
+from ocr_processor.metrics import span
+
+
+class RunRateLimited(Exception):
+    """An assistant run ended because the rate limit was exceeded."""
+
+
+# Errors worth retrying; anything else (bad request, auth) fails straight away
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # Includes timeouts
+    openai.InternalServerError,
+    RunRateLimited,
+)
+
+# Statuses of a run that is still going; a thread can only have one such run at a time
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+class AsyncAssistantClient:
+    """
+    Asyncio client that sends many documents to one assistant at once.
+
+    One assistant and one HTTP connection pool are shared by every request.
+    Each document gets its own thread; documents longer than the token budget
+    are split into parts that are added to the thread as separate messages.
+    At most max_concurrency documents are in flight at a time, and requests
+    that hit rate limits, timeouts or server errors are retried with
+    exponential backoff.
+
+    To test without the API, pass base_url pointing at a local stub server,
+    or pass a ready-made client.
+
+    Parameters:
+        api_key (str, optional): API key. Defaults to config.API_KEY.
+        base_url (str, optional): API endpoint. Defaults to config.BASE_URL.
+        max_concurrency (int, optional): Documents in flight at once.
+            Defaults to config.MAX_CONCURRENT_REQUESTS.
+        chunk_tokens (int, optional): Token budget per message.
+            Defaults to config.CHUNK_TOKENS.
+        max_retries (int, optional): Retries per request. Defaults to config.MAX_RETRIES.
+        assistant_id (str, optional): Existing assistant to use. Defaults to
+            config.ASSISTANT_ID; a new assistant is created when neither is set.
+        client (AsyncOpenAI, optional): Client to use instead of creating one.
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=None, chunk_tokens=None, max_retries=None,
+                 assistant_id=None, client=None):
+        self.max_concurrency = max_concurrency or config.MAX_CONCURRENT_REQUESTS
+        self.chunk_tokens = chunk_tokens or config.CHUNK_TOKENS
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.assistant_id = assistant_id or config.ASSISTANT_ID
+        if client is None:
+            # One client keeps one connection pool for every request. Retries
+            # are handled here, so the SDK's own retries are turned off.
+            client = AsyncOpenAI(api_key=api_key or config.API_KEY, base_url=base_url or config.BASE_URL,
+                                 max_retries=0)
+        self.client = client
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._assistant_lock = asyncio.Lock()
+
+    async def _with_retry(self, operation, request, *args, **kwargs):
+        """
+        Await request(*args, **kwargs), retrying retryable errors with backoff.
+
+        The wait doubles from one second up to a minute, with jitter so that
+        concurrent requests do not retry in lockstep. A Retry-After header from
+        the server takes precedence.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                with span("llm_request", operation=operation, attempt=attempt):
+                    return await request(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+                response = getattr(e, "response", None)
+                retry_after = response.headers.get("retry-after") if response is not None else None
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        pass
+                print(f"{operation} failed ({type(e).__name__}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+    async def get_assistant_id(self):
+        """Return the assistant's id, creating the assistant on the first call."""
+        async with self._assistant_lock:
+            if self.assistant_id is None:
+                assistant = await self._with_retry(
+                    "create_assistant", self.client.beta.assistants.create,
+                    name="RASA AI",
+                    instructions=config.INSTRUCTIONS,
+                    tools=[{"type": "file_search"}],
+                    model=config.MODEL,
+                )
+                self.assistant_id = assistant.id
+        return self.assistant_id
+
+    async def _run(self, thread_id, instructions, started):
+        """
+        Run the assistant on a thread until it finishes.
+
+        A connection can drop after the server has created the run, and the
+        API rejects a second run while the first is active. So once an
+        attempt has started a run, later attempts look for the thread's
+        active run and poll it instead of creating another.
+
+        Parameters:
+            thread_id (str): The thread.
+            instructions (str): Run instructions.
+            started (list): Shared by the attempts for one thread; records
+                that a run was requested.
+        """
+        run = None
+        if started:
+            runs = await self.client.beta.threads.runs.list(thread_id=thread_id, order="desc", limit=1)
+            if runs.data and runs.data[0].status in ACTIVE_RUN_STATUSES:
+                run = runs.data[0]
+        if run is None:
+            started.append(True)
+            run = await self.client.beta.threads.runs.create(
+                thread_id=thread_id,
+                assistant_id=await self.get_assistant_id(),
+                instructions=instructions,
+            )
+        run = await self.client.beta.threads.runs.poll(run.id, thread_id=thread_id)
+        if run.status != "completed":
+            last_error = run.last_error
+            if last_error is not None and last_error.code == "rate_limit_exceeded":
+                raise RunRateLimited(last_error.message)
+            raise RuntimeError(f"Assistant run {run.id} ended with status {run.status}: {last_error}")
+        return run
+
+    async def process_document(self, text, instructions=None):
+        """
+        Send one document to the assistant and return its reply.
+
+        Parameters:
+            text (str): Document text.
+            instructions (str, optional): Run instructions. Defaults to config.INSTRUCTIONS.
+
+        Returns:
+            str: The assistant's reply, or an empty string for an empty document.
+        """
+        chunks = chunk_text(text, self.chunk_tokens, config.MODEL)
+        if not chunks:
+            return ""
+        if len(chunks) > 1:
+            chunks = [f"Part {i} of {len(chunks)}:\n{chunk}" for i, chunk in enumerate(chunks, start=1)]
+
+        async with self._semaphore:
+            # The thread is created with every part in a single request
+            thread = await self._with_retry(
+                "create_thread", self.client.beta.threads.create,
+                messages=[{"role": "user", "content": chunk} for chunk in chunks],
+            )
+            await self._with_retry("run", self._run, thread.id, instructions or config.INSTRUCTIONS, [])
+            messages = await self._with_retry(
+                "list_messages", self.client.beta.threads.messages.list,
+                thread_id=thread.id, order="desc", limit=1,
+            )
+
+        reply = messages.data[0] if messages.data else None
+        if reply is None or reply.role != "assistant":
+            return ""
+        return "\n".join(part.text.value for part in reply.content if part.type == "text")
+
+    async def process_documents(self, texts, instructions=None):
+        """
+        Send several documents to the assistant concurrently.
+
+        A failed document does not stop the others; its exception is returned
+        in its place.
+
+        Parameters:
+            texts (iterable): Document texts.
+            instructions (str, optional): Run instructions. Defaults to config.INSTRUCTIONS.
+
+        Returns:
+            list: The reply or exception for each document, in input order.
+        """
+        return await asyncio.gather(
+            *(self.process_document(text, instructions) for text in texts),
+            return_exceptions=True,
+        )
+
+    async def close(self):
+        """Close the HTTP connection pool."""
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
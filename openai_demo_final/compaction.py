@@ -0,0 +1,242 @@
+import re
+from collections import Counter
+
+import config
+from tokens import count_tokens
+from ocr_processor import as_page_result, ocr_results_to_text, page_layout, regions_from_ocr
+
+TRUNCATION_MARKER = "[... truncated to fit the token budget ...]"
+
+# Digits are masked when matching headers and footers, so "Page 3 of 10" matches "Page 4 of 10"
+_DIGITS = re.compile(r"\d+")
+
+
+def drop_low_confidence(ocr_results, min_confidence):
+    """
+    Remove OCR regions recognised with a confidence below min_confidence.
+
+    Args:
+        ocr_results (list or PageResult): OCR results in PaddleOCR's format.
+        min_confidence (float): Lowest confidence to keep.
+
+    Returns:
+        tuple: The filtered OCR results as a PageResult and the number of regions dropped.
+    """
+    result = as_page_result(ocr_results)
+    kept = result.filter(min_score=min_confidence)
+    return kept, len(result) - len(kept)
+
+
+def _edge_key(line):
+    return _DIGITS.sub("#", " ".join(line.split()).lower())
+
+
+def find_repeated_edges(pages_lines, edge_lines=2, min_fraction=0.5):
+    """
+    Find header and footer lines repeated across pages.
+
+    A line counts when it is among the first or last edge_lines lines of at
+    least min_fraction of the pages (and of two pages or more). Short pages
+    only contribute their first and last third, so their body is never
+    mistaken for a header. Numbers are ignored when comparing, so page
+    numbers and dates do not hide a repeat.
+
+    Args:
+        pages_lines (list): The lines of each page.
+        edge_lines (int): Lines at the top and bottom of a page to consider.
+        min_fraction (float): Share of pages a line must repeat on.
+
+    Returns:
+        set: Normalised keys of the repeated lines.
+    """
+    if len(pages_lines) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages_lines:
+        n = min(edge_lines, len(lines) // 3)
+        edges = lines[:n] + lines[len(lines) - n:]
+        counts.update({_edge_key(line) for line in edges if line.strip()})
+    min_pages = max(2, min_fraction * len(pages_lines))
+    return {key for key, n in counts.items() if n >= min_pages}
+
+
+class PageCompactor:
+    """
+    Shrink extracted document text page by page before it is sent to the assistant.
+
+    For each page, in order, this:
+        1. drops OCR regions below min_confidence and rebuilds the page text,
+        2. removes header and footer lines repeated across pages, keeping
+           their first occurrence,
+        3. optionally removes a line that repeats the line just before it,
+        4. cuts the document off once it reaches max_tokens.
+
+    Headers and footers are recognised from the first header_pages pages, so
+    those are held back until enough of them have arrived; every later page
+    is compacted as soon as it is added. Lines that repeat elsewhere in the
+    document are kept, since identical table rows are data.
+
+    Header, footer and duplicate detection work line by line, so they need
+    pages extracted with layout=True; single-line pages are left alone.
+
+    Args:
+        max_tokens (int, optional): Token budget for the document. Defaults
+            to config.COMPACT_MAX_TOKENS; 0 or None there means no limit.
+        min_confidence (float, optional): Lowest OCR confidence to keep.
+            Defaults to config.MIN_OCR_CONFIDENCE.
+        layout (bool): Rebuild OCR page text with rows and cells, as
+            iter_pdf_pages does with layout=True.
+        dedupe_lines (bool): Remove a line identical to the line before it,
+            e.g. text repeated by overlapping OCR regions. Off by default,
+            since two identical table rows in a row are also data.
+        drop_headers (bool): Remove repeated headers and footers.
+        model (str, optional): Model whose tokenizer counts tokens. Defaults to config.MODEL.
+        header_pages (int, optional): Pages to look for headers and footers
+            on. None looks at every page, holding them all back until finish().
+    """
+
+    def __init__(self, max_tokens=None, min_confidence=None, layout=True, dedupe_lines=False, drop_headers=True,
+                 model=None, header_pages=None):
+        max_tokens = config.COMPACT_MAX_TOKENS if max_tokens is None else max_tokens
+        self.min_confidence = config.MIN_OCR_CONFIDENCE if min_confidence is None else min_confidence
+        self.model = model or config.MODEL
+        self.layout = layout
+        self.dedupe_lines = dedupe_lines
+        self.drop_headers = drop_headers
+        self.header_pages = header_pages
+        self.budget = max_tokens - count_tokens(TRUNCATION_MARKER, self.model) - 1 if max_tokens else None
+        self.stats = {"pages": 0, "low_confidence_regions": 0, "header_footer_lines": 0, "duplicate_lines": 0,
+                      "truncated_lines": 0, "tokens_before": 0, "lines_before": 0, "lines_after": 0,
+                      "tokens_after": 0}
+        self._held = []
+        self._repeated_edges = None
+        self._seen_edges = set()
+        self._last_line = None
+        self._truncated = False
+        self._used = 0
+
+    def _page_lines(self, page):
+        """Return a page's number and its non-empty lines after dropping low-confidence OCR."""
+        if isinstance(page, str):
+            number, text = self.stats["pages"], page
+        else:
+            number, text = page["page"], page["text"]
+        self.stats["pages"] += 1
+        self.stats["tokens_before"] += count_tokens(text, self.model) + 1  # Plus the page break
+        self.stats["lines_before"] += len(text.splitlines())
+        if not isinstance(page, str) and page.get("ocr_results") is not None and self.min_confidence > 0:
+            ocr_results, dropped = drop_low_confidence(page["ocr_results"], self.min_confidence)
+            if dropped:
+                self.stats["low_confidence_regions"] += dropped
+                if self.layout:
+                    text = page_layout(*regions_from_ocr(ocr_results))[0]
+                else:
+                    text = ocr_results_to_text(ocr_results)
+        return number, [line.strip() for line in text.splitlines() if line.strip()]
+
+    def _compact(self, page_lines):
+        """Compact one page's lines once the repeated edges are known."""
+        lines = []
+        for line in page_lines:
+            if self._truncated:
+                self.stats["truncated_lines"] += 1
+                continue
+            edge_key = _edge_key(line)
+            if edge_key in self._repeated_edges:
+                if edge_key in self._seen_edges:
+                    self.stats["header_footer_lines"] += 1
+                    continue
+                self._seen_edges.add(edge_key)
+            line_key = " ".join(line.split())
+            if self.dedupe_lines and line_key == self._last_line:
+                self.stats["duplicate_lines"] += 1
+                continue
+            self._last_line = line_key
+            line_tokens = count_tokens(line, self.model) + 1  # Plus the newline
+            if self.budget is not None and self._used + line_tokens > self.budget:
+                self._truncated = True
+                self.stats["truncated_lines"] += 1
+                line = TRUNCATION_MARKER
+            lines.append(line)
+            self._used += line_tokens
+        text = "\n".join(lines)
+        if lines:
+            # Counted like tokens_before, so the two compare fairly
+            self.stats["lines_after"] += len(lines)
+            self.stats["tokens_after"] += count_tokens(text, self.model) + 1
+        return text
+
+    def _release(self):
+        """Find the repeated edges in the held pages and compact them."""
+        held = self._held
+        self._held = []
+        if self._repeated_edges is None:
+            self._repeated_edges = find_repeated_edges([lines for _, lines in held]) if self.drop_headers else set()
+        return [(number, self._compact(lines)) for number, lines in held]
+
+    def add(self, page):
+        """
+        Add the next page of the document.
+
+        Args:
+            page (dict or str): Page record from process_bridge.iter_pdf_pages,
+                or plain page text.
+
+        Returns:
+            list: (page number, compacted text) for each page that is ready,
+            in page order. Empty while pages are held back for header
+            detection; the text is empty for a page with nothing left.
+        """
+        self._held.append(self._page_lines(page))
+        if self._repeated_edges is None and (self.header_pages is None or len(self._held) < self.header_pages):
+            return []
+        return self._release()
+
+    def finish(self):
+        """
+        Compact the pages still held back, at the end of the document.
+
+        Returns:
+            list: (page number, compacted text) for the remaining pages.
+        """
+        ready = self._release()
+        self.stats["tokens_saved"] = self.stats["tokens_before"] - self.stats["tokens_after"]
+        return ready
+
+
+def compact_pages(pages, header_pages=None, **options):
+    """
+    Shrink a whole document's extracted text, see PageCompactor.
+
+    Args:
+        pages (iterable): Page records from process_bridge.iter_pdf_pages, or
+            plain page texts.
+        header_pages (int, optional): Pages to look for headers and footers
+            on. Defaults to every page.
+        **options: Passed to PageCompactor (max_tokens, min_confidence,
+            layout, dedupe_lines, drop_headers, model).
+
+    Returns:
+        tuple: The compacted text and a dict of statistics (tokens and lines
+        before and after, and how many were dropped by each step).
+    """
+    compactor = PageCompactor(header_pages=header_pages, **options)
+    texts = []
+    for page in pages:
+        texts.extend(text for _, text in compactor.add(page))
+    texts.extend(text for _, text in compactor.finish())
+    return "\n".join(text for text in texts if text), compactor.stats
+
+
+def compact_text(text, **options):
+    """
+    Compact plain text, treating form feeds as page breaks.
+
+    Args:
+        text (str): Text to compact.
+        **options: Passed to compact_pages.
+
+    Returns:
+        tuple: The compacted text and a dict of statistics.
+    """
+    return compact_pages(text.split("\f"), **options)
@@ -1,5 +1,44 @@
 API_KEY = "YOUR API KEY"
 
+# Model used by the assistant
+MODEL = "gpt-4o"
+
+# API endpoint; None uses OpenAI. Point this at a local stub server for testing.
+BASE_URL = None
+
+# Reuse an existing assistant instead of creating one per process
+ASSISTANT_ID = None
+
+# Documents sent to the assistant at the same time by the async client
+MAX_CONCURRENT_REQUESTS = 4
+
+# Threads rendering documents for OCR when several PDFs are processed at once
+RENDER_WORKERS = 2
+
+# OCR worker processes for several PDFs at once; 0 OCRs in this process
+OCR_WORKERS = 0
+
+# Rendered pages and finished documents each pipeline queue holds before the stage feeding it waits
+PIPELINE_QUEUE_SIZE = 8
+
+# Print the pipeline's queue depths this often, in seconds; None disables it
+PIPELINE_REPORT_SECONDS = None
+
+# Token budget per message when a long document is split into parts
+CHUNK_TOKENS = 8000
+
+# Retries on rate limits, timeouts and server errors, with exponential backoff
+MAX_RETRIES = 5
+
+# Token budget for a whole document after compaction; 0 disables trimming
+COMPACT_MAX_TOKENS = 30000
+
+# Pages headers and footers are recognised from; later pages are compacted and sent as they are extracted
+HEADER_PAGES = 3
+
+# OCR regions recognised with a lower confidence are left out of the prompt
+MIN_OCR_CONFIDENCE = 0.6
+
 INSTRUCTIONS = """Data Extraction and Structuring Requirements:
 
 The task involves extracting all relevant data from a text, specifically those titled "Bill of Lading," "CMR," or "Invoice." The extracted data must be organized into a structured table format with clearly defined variable names as headers (e.g., "Company Name," "Location").
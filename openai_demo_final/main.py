@@ -1,42 +1,155 @@
 # main.py
-from openai_client import client, assistant
+import asyncio
+import sys
+
+from openai_client import client, get_assistant
+from async_client import AsyncAssistantClient
+from compaction import PageCompactor, compact_pages
+from tokens import chunk_text
 from assistant_handler import EventHandler
 import config
-from process_bridge import process_pdf, clean_and_sort_text
+from process_bridge import iter_pdf_pages
+from pipeline import Pipeline
+from ocr_processor import OCRWorkerPool
+from ocr_processor.metrics import span
+
+def add_user_message(thread, user_text):
+    """Add a user message to an existing thread."""
+    with span("llm_request", operation="add_message", chars=len(user_text)):
+        client.beta.threads.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=user_text
+        )
+
+def run_thread(thread):
+    """Run the assistant on a thread and stream its response."""
+    with span("llm_request", operation="run"), client.beta.threads.runs.stream(
+        thread_id=thread.id,
+        assistant_id=get_assistant().id,
+        instructions=config.INSTRUCTIONS,
+        event_handler=EventHandler(),
+    ) as stream:
+        stream.until_done()
 
 def chat_with_gpt(user_text):
     """Send user input to GPT and stream response."""
     thread = client.beta.threads.create()
 
     # Create a message in the thread
-    client.beta.threads.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content=user_text
-    )
+    add_user_message(thread, user_text)
 
     # Run the assistant and stream response
-    with client.beta.threads.runs.stream(
-        thread_id=thread.id,
-        assistant_id=assistant.id,
-        instructions=config.INSTRUCTIONS,
-        event_handler=EventHandler(),
-    ) as stream:
-        stream.until_done()
+    run_thread(thread)
+
+def send_pdf_pages(thread, pdf_path):
+    """
+    Extract a PDF and upload its compacted pages to a thread as they are extracted.
+
+    Headers and footers are recognised from the first config.HEADER_PAGES
+    pages, which are sent together once that many have been extracted;
+    every later page is compacted and sent as soon as it is extracted, so
+    the upload overlaps with OCR of the following pages.
+
+    Args:
+        thread: The assistant thread.
+        pdf_path (str): Path to the PDF.
+
+    Returns:
+        int: Number of pages sent.
+    """
+    compactor = PageCompactor(header_pages=config.HEADER_PAGES)
+    sent_pages = 0
+
+    def send(ready):
+        nonlocal sent_pages
+        for page_number, text in ready:
+            if not text:
+                continue
+            for chunk in chunk_text(f"Page {page_number + 1}:\n{text}", config.CHUNK_TOKENS, config.MODEL):
+                add_user_message(thread, chunk)
+            sent_pages += 1
+
+    # Rows in reading order with " | " between cells keep the tables intact for the model
+    for page in iter_pdf_pages(pdf_path, layout=True):
+        print(f"\n--- Page {page['page'] + 1} ({page['source']}) ---\n")
+        print(page["text"])
+        send(compactor.add(page))
+    send(compactor.finish())
+
+    stats = compactor.stats
+    print(f"{pdf_path}: {stats['tokens_before']} -> {stats['tokens_after']} tokens after compaction ({stats})")
+    return sent_pages
+
+def compact_for_assistant(pdf_path, pages):
+    """
+    Compact the extracted pages of a PDF for the assistant.
+
+    Args:
+        pdf_path (str): Path to the PDF, for the printed statistics.
+        pages (iterable): Page records in page order.
+
+    Returns:
+        tuple: The compacted text and its compaction statistics.
+    """
+    text, stats = compact_pages(pages)
+    print(f"{pdf_path}: {stats['tokens_before']} -> {stats['tokens_after']} tokens after compaction ({stats})")
+    return text, stats
+
+async def process_pdfs(pdf_paths):
+    """
+    Extract several PDFs and send them to the assistant concurrently.
+
+    Rendering, OCR and the assistant requests run as separate pipeline
+    stages, so one document is rendered while another is OCR'd and a third
+    is with the assistant. See config.RENDER_WORKERS, OCR_WORKERS and
+    PIPELINE_QUEUE_SIZE.
+
+    Args:
+        pdf_paths (list): Paths to the PDFs.
+
+    Returns:
+        list: The reply or exception for each PDF, in input order.
+    """
+    pool = OCRWorkerPool(workers=config.OCR_WORKERS) if config.OCR_WORKERS else None
+    try:
+        async with AsyncAssistantClient() as llm:
+            pipeline = Pipeline(
+                pool=pool,
+                layout=True,
+                render_workers=config.RENDER_WORKERS,
+                llm_concurrency=config.MAX_CONCURRENT_REQUESTS,
+                queue_size=config.PIPELINE_QUEUE_SIZE,
+                report_every=config.PIPELINE_REPORT_SECONDS,
+            )
+            return await pipeline.run(
+                pdf_paths,
+                submit=llm.process_document,
+                assemble=lambda pdf_path, pages: compact_for_assistant(pdf_path, pages)[0],
+            )
+    finally:
+        if pool is not None:
+            pool.close()
 
 if __name__ == "__main__":
+    # With PDF paths as arguments, send them all to the assistant concurrently
+    if len(sys.argv) > 1:
+        for pdf_path, reply in zip(sys.argv[1:], asyncio.run(process_pdfs(sys.argv[1:]))):
+            print(f"\n=== {pdf_path} ===\n")
+            print(f"Error: {reply}" if isinstance(reply, BaseException) else reply)
+        sys.exit(0)
+
     # Get the PDF file path from the user
     pdf_path = input("Enter the full path to your PDF file: ").strip()
     if not pdf_path:
         print("No PDF path provided. Exiting.")
         exit(1)
 
-    # Process the PDF and get the extracted text
-    extracted_text = process_pdf(pdf_path)
-    cleaned_text = clean_and_sort_text(extracted_text)
-
-    print("\n--- Extracted, Cleaned & Sorted Text ---\n")
-    print(cleaned_text)
+    # Each page is uploaded to the thread as soon as it is extracted and compacted
+    thread = client.beta.threads.create()
+    if not send_pdf_pages(thread, pdf_path):
+        print("No text could be extracted from the PDF.")
+        exit(1)
 
-    # Use the entire cleaned text as the input to chat_with_gpt
-    chat_with_gpt(cleaned_text)
+    # Ask the assistant once every page is in the thread
+    run_thread(thread)
@@ -1,11 +1,22 @@
 from openai import OpenAI
 import config
 
-client = OpenAI(api_key=config.API_KEY)
-
-assistant = client.beta.assistants.create(
-    name="RASA AI",
-    instructions=config.INSTRUCTIONS,
-    tools=[{"type": "file_search"}],
-    model="gpt-4o",
-)
+client = OpenAI(api_key=config.API_KEY, base_url=config.BASE_URL)
+
+# Created on first use so importing this module makes no network requests
+_assistant = None
+
+
+def get_assistant():
+    """Return the RASA AI assistant, creating it on the first call."""
+    global _assistant
+    if _assistant is None and config.ASSISTANT_ID:
+        _assistant = client.beta.assistants.retrieve(config.ASSISTANT_ID)
+    if _assistant is None:
+        _assistant = client.beta.assistants.create(
+            name="RASA AI",
+            instructions=config.INSTRUCTIONS,
+            tools=[{"type": "file_search"}],
+            model=config.MODEL,
+        )
+    return _assistant
@@ -0,0 +1,90 @@
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to an estimate when tiktoken is not installed
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    """Return the tiktoken encoding for a model, or None if it is unknown."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return None
+
+
+def count_tokens(text, model="gpt-4o"):
+    """
+    Count the tokens a text costs, without calling the API.
+
+    Uses tiktoken when it is installed. Otherwise the count is estimated from
+    the characters: about four per token for Latin text and two per token for
+    other scripts such as Persian, which tokenise less densely.
+
+    Args:
+        text (str): Text to count.
+        model (str): Model whose tokenizer to use.
+
+    Returns:
+        int: Number of tokens.
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        encoding = _encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def chunk_text(text, max_tokens, model="gpt-4o"):
+    """
+    Split text into chunks of at most max_tokens tokens, breaking between lines.
+
+    Lines are kept whole where possible so table rows and label/value pairs
+    stay together; a single line longer than the budget is split between words.
+
+    Args:
+        text (str): Text to split.
+        max_tokens (int): Token budget per chunk.
+        model (str): Model whose tokenizer to use.
+
+    Returns:
+        list: The chunks, in order.
+    """
+    chunks, current, current_tokens = [], [], 0
+
+    def pieces():
+        for line in text.splitlines():
+            line_tokens = count_tokens(line, model) + 1  # Plus the newline
+            if line_tokens <= max_tokens:
+                yield line, line_tokens
+                continue
+            # Keep a running count so each word is tokenised once. Tokenizers split before a
+            # space and a word, so the sum matches counting the joined words; the estimate
+            # without tiktoken rounds each word up and errs on the small side
+            part, part_tokens = [], 1
+            for word in line.split():
+                word_tokens = count_tokens(" " + word if part else word, model)
+                if part and part_tokens + word_tokens > max_tokens:
+                    yield " ".join(part), part_tokens
+                    part, part_tokens = [], 1
+                    word_tokens = count_tokens(word, model)
+                part.append(word)
+                part_tokens += word_tokens
+            if part:
+                yield " ".join(part), part_tokens
+
+    for line, line_tokens in pieces():
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current and any(line.strip() for line in current):
+        chunks.append("\n".join(current))
+    return chunks
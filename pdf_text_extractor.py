@@ -1,39 +1,177 @@
+import mmap
+import multiprocessing
+import os
+import time
+
+import fitz  # PyMuPDF
 import PyPDF2
 
+from ocr_processor.metrics import span
+
 
-def extract_clean_text(pdf_path):
+def clean_page_text(page_text):
     """
-    Extracts and formats text from a PDF file.
+    Put a page's text on one line without '\\n' or extra whitespace.
 
     Args:
-        pdf_path (str): Path to the PDF file.
+        page_text (str): Text extracted from a page.
 
     Returns:
-        str: Cleaned and formatted text from the PDF.
+        str: The cleaned text.
+    """
+    return ' '.join(line.strip() for line in page_text.splitlines() if line.strip())
+
+
+def parse_page_range(page_range, page_count):
+    """
+    Turn a page selection into zero-based page numbers.
+
+    Args:
+        page_range (str or iterable or None): A string of one-based pages and
+            ranges such as "1-3,7", zero-based page numbers, or None for all pages.
+        page_count (int): Number of pages in the document.
+
+    Returns:
+        list: Zero-based page numbers in the given order.
+
+    Raises:
+        ValueError: If a page is outside the document or the string is malformed.
+    """
+    if page_range is None:
+        return list(range(page_count))
+    if isinstance(page_range, str):
+        numbers = []
+        for part in page_range.replace(' ', '').split(','):
+            if not part:
+                continue
+            first, _, last = part.partition('-')
+            first = int(first)
+            last = int(last) if last else (page_count if part.endswith('-') else first)
+            numbers.extend(range(first - 1, last))
+    else:
+        numbers = list(page_range)
+    for number in numbers:
+        if not 0 <= number < page_count:
+            raise ValueError(f"Page {number + 1} is outside the document ({page_count} pages)")
+    return numbers
+
+
+def _pymupdf_pages(pdf_path, page_range):
+    """Yield (page number, raw text) with PyMuPDF, which reads the file on demand."""
+    with fitz.open(pdf_path) as doc:
+        for number in parse_page_range(page_range, len(doc)):
+            yield number, doc.load_page(number).get_text()
+
+
+def _pypdf2_pages(pdf_path, page_range):
+    """Yield (page number, raw text) with PyPDF2, reading the file through a memory map."""
+    with open(pdf_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise PyPDF2.errors.PdfReadError("Cannot read an empty file")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+            pdf_reader = PyPDF2.PdfReader(stream)
+            for number in parse_page_range(page_range, len(pdf_reader.pages)):
+                yield number, pdf_reader.pages[number].extract_text()
+
+
+# Extraction backends by name; each yields (page number, raw text) for the selected pages
+BACKENDS = {
+    'pymupdf': _pymupdf_pages,
+    'pypdf2': _pypdf2_pages,
+}
+
+# Errors a backend raises for a missing or unreadable PDF; PyMuPDF's derive from RuntimeError
+READ_ERRORS = (FileNotFoundError, PyPDF2.errors.PdfReadError, RuntimeError)
+
+
+def register_backend(name, page_reader):
+    """
+    Add an extraction backend.
+
+    Args:
+        name (str): Name to select the backend by.
+        page_reader (callable): Called as page_reader(pdf_path, page_range) and
+            yields (zero-based page number, raw page text).
+    """
+    BACKENDS[name] = page_reader
+
+
+def iter_clean_text(pdf_path, backend='pymupdf', pages=None, timeout=None):
+    """
+    Extract and clean text from a PDF one page at a time.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        backend (str): Name of the extraction backend, 'pymupdf' or 'pypdf2'.
+        pages (str or iterable, optional): Pages to extract, e.g. "1-3,7", or
+            zero-based page numbers. All pages when omitted.
+        timeout (float, optional): Seconds after which extraction stops. It is
+            checked between pages; use extract_clean_text to also bound a
+            single page that never finishes.
+
+    Yields:
+        tuple: Zero-based page number and cleaned text, for pages with text.
 
     Raises:
         RuntimeError: If an error occurs while reading the PDF.
+        TimeoutError: If the timeout passes before the last page.
+        ValueError: For an unknown backend or page outside the document.
     """
-    extracted_text = []
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend '{backend}'; choose from {', '.join(BACKENDS)}")
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
+        for number, page_text in BACKENDS[backend](pdf_path, pages):
+            if page_text:
+                cleaned_page_text = clean_page_text(page_text)
+                if cleaned_page_text:
+                    yield number, cleaned_page_text
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Extracting text from '{pdf_path}' took longer than {timeout} seconds")
+    except READ_ERRORS as e:
+        raise RuntimeError(f"Error extracting text from PDF '{pdf_path}': {e}")
 
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    # Clean and concatenate text without '\n' or extra whitespace
-                    cleaned_page_text = ' '.join(line.strip() for line in page_text.splitlines() if line.strip())
-                    extracted_text.append(cleaned_page_text)
 
-        cleaned_text = ' '.join(extracted_text)
+def _extract_joined(pdf_path, backend, pages):
+    return ' '.join(text for _, text in iter_clean_text(pdf_path, backend, pages))
 
-    except (FileNotFoundError, PyPDF2.errors.PdfReadError) as e:
-        raise RuntimeError(f"Error extracting text from PDF '{pdf_path}': {e}")
 
-    return cleaned_text
+def extract_clean_text(pdf_path, backend='pymupdf', pages=None, timeout=None):
+    """
+    Extracts and formats text from a PDF file.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        backend (str): Name of the extraction backend, 'pymupdf' or 'pypdf2'.
+        pages (str or iterable, optional): Pages to extract, e.g. "1-3,7", or
+            zero-based page numbers. All pages when omitted.
+        timeout (float, optional): Seconds to allow. With a timeout, extraction
+            runs in a separate process that is killed when time runs out, so
+            even a page that hangs the parser cannot stall the caller.
+
+    Returns:
+        str: Cleaned and formatted text from the PDF.
+
+    Raises:
+        RuntimeError: If an error occurs while reading the PDF.
+        TimeoutError: If extraction takes longer than the timeout.
+    """
+    with span("extract", document=pdf_path, backend=backend):
+        if timeout is None:
+            return _extract_joined(pdf_path, backend, pages)
+
+        pool = multiprocessing.get_context('spawn').Pool(1)
+        try:
+            return pool.apply_async(_extract_joined, (pdf_path, backend, pages)).get(timeout)
+        except multiprocessing.TimeoutError:
+            raise TimeoutError(f"Extracting text from '{pdf_path}' took longer than {timeout} seconds")
+        finally:
+            pool.terminate()
 
 
 # This module can now be imported and used in other Python files like:
-# from pdf_text_extractor import extract_clean_text
+# from pdf_text_extractor import extract_clean_text, iter_clean_text
 # text = extract_clean_text('path/to/file.pdf')
+# for page_number, page_text in iter_clean_text('path/to/file.pdf', pages="1-3"):
+#     print(page_number, page_text)
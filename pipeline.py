@@ -0,0 +1,321 @@
+"""
+pipeline.py
+
+A staged, asynchronous pipeline for extracting many PDFs and sending them to an LLM.
+
+process_bridge.iter_pdf_pages handles one document at a time: a page is rendered, OCR'd and
+merged before the document is handed on, so rendering, OCR and the LLM request of different
+documents never overlap. The Pipeline here splits that work into three stages joined by
+bounded queues:
+
+- Render: worker threads open each document, classify its pages, take the text layer of
+  digital pages and render the pages that need OCR.
+- OCR: rendered pages are OCR'd on an OCRWorkerPool (or in this process without one).
+- LLM: once every page of a document is done, its text is assembled and submitted with an
+  async callable, e.g. AsyncAssistantClient.process_document.
+
+Each stage has its own concurrency, and each queue holds at most queue_size items, so a slow
+stage holds back the one before it instead of letting rendered pages pile up in memory.
+queue_depths() reports how full each queue is; a queue that stays full points at the stage
+after it as the bottleneck, one that stays empty at the stage before it.
+
+Searchable PDFs, fingerprint reuse, checkpoints and tiling are per-document features of
+iter_pdf_pages and are not part of this pipeline.
+
+Usage:
+    replies = asyncio.run(Pipeline(pool=pool).run(pdf_paths, submit=llm.process_document))
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+
+from check_readable_PDFs import PAGE_IMAGE
+from ocr_processor import TwoTierOCR, process_image_array
+from ocr_processor.metrics import count, get_metrics, span
+from process_bridge import fill_ocr_text, render_page, start_page_record
+
+
+def join_page_texts(pdf_path, pages):
+    """
+    Default assemble step: join the text of a document's pages in page order.
+
+    Args:
+        pdf_path (str): Path to the document.
+        pages (list): Page records, as described in process_bridge.iter_pdf_pages.
+
+    Returns:
+        str: The document text.
+    """
+    return "\n".join(page["text"] for page in pages if page["text"])
+
+
+class _Document:
+    """Progress of one document through the pipeline."""
+
+    def __init__(self, index, pdf_path):
+        self.index = index
+        self.pdf_path = pdf_path
+        self.pages = []
+        self.pending_ocr = 0
+        self.rendered = False
+        self.finished = False
+        self.error = None
+
+
+class Pipeline:
+    """
+    Extract PDFs and submit them to an LLM with rendering, OCR and submission overlapped.
+
+    PyMuPDF is not thread-safe, so the render threads take turns on a lock
+    while they use it. Extra render workers still let one document be opened
+    and classified while another waits for room on the OCR queue.
+
+    Parameters:
+        pool (OCRWorkerPool, optional): Worker pool for OCR. Without one, pages
+            are OCR'd one at a time in a thread of this process.
+        cache (OCRCache, optional): OCR result cache keyed by image content.
+        lang (str): OCR language when no pool is given.
+        layout (bool): Rebuild rows and cells from word and OCR boxes.
+        min_page_chars (int): Minimum number of text-layer characters for a
+            page to skip OCR.
+        render_options (dict, optional): Options for rendering pages that need
+            OCR, passed to process_bridge.render_page.
+        two_tier (dict, optional): TwoTierOCR options when no pool is given;
+            a pool is configured with its own.
+        render_workers (int): Documents rendered at the same time.
+        ocr_concurrency (int, optional): Pages OCR'd at the same time. Defaults
+            to the pool's max_pending, or 1 without a pool.
+        llm_concurrency (int): Documents submitted at the same time.
+        queue_size (int): Capacity of the OCR and LLM queues.
+        report_every (float, optional): Print the queue depths every this many
+            seconds while running.
+    """
+
+    def __init__(self, pool=None, cache=None, lang='en', layout=True, min_page_chars=10, render_options=None,
+                 two_tier=None, render_workers=2, ocr_concurrency=None, llm_concurrency=4, queue_size=8,
+                 report_every=None):
+        self.pool = pool
+        self.cache = cache
+        self.lang = lang
+        self.layout = layout
+        self.min_page_chars = min_page_chars
+        self.render_options = render_options or {}
+        self.two_tier_ocr = TwoTierOCR(lang, **two_tier) if two_tier is not None and pool is None else None
+        self.render_workers = max(1, render_workers)
+        if pool is None:
+            # The in-process OCR engine must not be used from two threads at once
+            self.ocr_concurrency = 1
+        else:
+            self.ocr_concurrency = max(1, ocr_concurrency or pool.max_pending)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.queue_size = max(1, queue_size)
+        self.report_every = report_every
+        self._fitz_lock = threading.Lock()
+        self._ocr_queue = None
+        self._llm_queue = None
+        self._waiting = []
+        self._ocr_in_flight = 0
+        self._llm_in_flight = 0
+        self.max_depths = {}
+
+    def queue_depths(self):
+        """
+        Report how much work is waiting at each stage.
+
+        Returns:
+            dict: render (documents not yet started), ocr (rendered pages
+            waiting for OCR), ocr_in_flight, llm (assembled documents waiting
+            to be submitted) and llm_in_flight.
+        """
+        return {
+            "render": len(self._waiting),
+            "ocr": self._ocr_queue.qsize() if self._ocr_queue is not None else 0,
+            "ocr_in_flight": self._ocr_in_flight,
+            "llm": self._llm_queue.qsize() if self._llm_queue is not None else 0,
+            "llm_in_flight": self._llm_in_flight,
+        }
+
+    def _note_depths(self):
+        """Keep the deepest each queue has been, for tuning after a run."""
+        for name, depth in self.queue_depths().items():
+            self.max_depths[name] = max(self.max_depths.get(name, 0), depth)
+
+    def _prepare_page(self, doc, pdf_path, page_num):
+        """Classify one page and render it if it needs OCR. Runs in a render thread."""
+        with self._fitz_lock:
+            page = doc.load_page(page_num)
+            record = start_page_record(page, pdf_path, self.min_page_chars, self.layout)
+            if record["kind"] != PAGE_IMAGE:
+                return record, None
+            record["source"] = "ocr"
+            start = time.perf_counter()
+            with span("render", document=pdf_path, page=page_num):
+                # Copied out of the pixmap, since the page is OCR'd after the next one renders
+                image = render_page(page, copy=True, **self.render_options)
+            record["timings"]["render"] = time.perf_counter() - start
+        return record, image
+
+    def _open(self, pdf_path):
+        """Open a document and return it with its page count. Runs in a render thread."""
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"File not found at {pdf_path}")
+        with self._fitz_lock:
+            doc = fitz.open(pdf_path)
+            return doc, len(doc)
+
+    def _close(self, doc):
+        with self._fitz_lock:
+            doc.close()
+
+    async def _render_worker(self, executor):
+        """Render documents in turn, queueing their image pages for OCR."""
+        loop = asyncio.get_running_loop()
+        while self._waiting:
+            document = self._waiting.pop(0)
+            doc = None
+            try:
+                doc, page_count = await loop.run_in_executor(executor, self._open, document.pdf_path)
+                print(f"Rendering {document.pdf_path} ({page_count} pages)")
+                for page_num in range(page_count):
+                    if document.error is not None:
+                        break
+                    record, image = await loop.run_in_executor(
+                        executor, self._prepare_page, doc, document.pdf_path, page_num)
+                    document.pages.append(record)
+                    if image is not None:
+                        document.pending_ocr += 1
+                        await self._ocr_queue.put((document, record, image))
+                        self._note_depths()
+            except Exception as e:
+                document.error = e
+            finally:
+                if doc is not None:
+                    await loop.run_in_executor(executor, self._close, doc)
+            document.rendered = True
+            await self._finish(document)
+
+    async def _ocr(self, image):
+        """OCR one page image on the pool, or in a thread without one."""
+        if self.pool is not None:
+            return await asyncio.wrap_future(self.pool.submit(image, cache=self.cache))
+        return await asyncio.to_thread(process_image_array, image, cache=self.cache, lang=self.lang,
+                                       two_tier=self.two_tier_ocr)
+
+    async def _ocr_worker(self):
+        """OCR queued pages and hand finished documents to the LLM stage."""
+        while True:
+            document, record, image = await self._ocr_queue.get()
+            try:
+                if document.error is None:
+                    self._ocr_in_flight += 1
+                    record["timings"]["ocr_start"] = time.perf_counter()
+                    try:
+                        ocr_results, image_width, image_height, *stats = await self._ocr(image)
+                    finally:
+                        self._ocr_in_flight -= 1
+                    record["timings"]["ocr"] = time.perf_counter() - record["timings"].pop("ocr_start")
+                    get_metrics().record_span("ocr", record["timings"]["ocr"],
+                                              {"document": document.pdf_path, "page": record["page"]})
+                    if stats and stats[0] is not None:
+                        record["ocr_stats"] = stats[0]
+                    fill_ocr_text(record, ocr_results, image_width, image_height, self.layout)
+            except Exception as e:
+                document.error = e
+            finally:
+                del image
+                document.pending_ocr -= 1
+                await self._finish(document)
+                self._ocr_queue.task_done()
+
+    async def _finish(self, document):
+        """Assemble a document once it is rendered and OCR'd, and queue it for the LLM stage."""
+        if document.finished or not document.rendered or (document.pending_ocr and document.error is None):
+            return
+        document.finished = True
+        if document.error is None:
+            try:
+                document.pages.sort(key=lambda page: page["page"])
+                text = await asyncio.to_thread(self._assemble, document.pdf_path, document.pages)
+            except Exception as e:
+                document.error = e
+        if document.error is not None:
+            print(f"Error processing {document.pdf_path}: {document.error}")
+            count("pipeline_documents", status="error")
+            self._results[document.index] = document.error
+            return
+        document.pages = None
+        if self._submit is None:
+            count("pipeline_documents", status="ok")
+            self._results[document.index] = text
+            return
+        await self._llm_queue.put((document, text))
+        self._note_depths()
+
+    async def _llm_worker(self):
+        """Submit assembled documents."""
+        while True:
+            document, text = await self._llm_queue.get()
+            self._llm_in_flight += 1
+            try:
+                with span("llm_request", operation="pipeline", document=document.pdf_path):
+                    self._results[document.index] = await self._submit(text)
+                count("pipeline_documents", status="ok")
+            except Exception as e:
+                print(f"Error submitting {document.pdf_path}: {e}")
+                count("pipeline_documents", status="error")
+                self._results[document.index] = e
+            finally:
+                self._llm_in_flight -= 1
+                self._llm_queue.task_done()
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            print(f"Pipeline queue depths: {self.queue_depths()}")
+
+    async def run(self, pdf_paths, submit=None, assemble=None):
+        """
+        Run every document through the pipeline.
+
+        Args:
+            pdf_paths (list): Paths to the PDFs.
+            submit (callable, optional): Async callable taking a document's text
+                and returning the reply. Without it, the texts are returned.
+            assemble (callable, optional): Builds a document's text from its
+                path and page records, in a worker thread. Defaults to
+                join_page_texts.
+
+        Returns:
+            list: The reply (or text) or exception for each PDF, in input order.
+        """
+        self._submit = submit
+        self._assemble = assemble or join_page_texts
+        self._results = [None] * len(pdf_paths)
+        self._waiting = [_Document(i, pdf_path) for i, pdf_path in enumerate(pdf_paths)]
+        self._ocr_queue = asyncio.Queue(self.queue_size)
+        self._llm_queue = asyncio.Queue(self.queue_size)
+        self.max_depths = {}
+
+        workers = [asyncio.create_task(self._ocr_worker()) for _ in range(self.ocr_concurrency)]
+        if submit is not None:
+            workers += [asyncio.create_task(self._llm_worker()) for _ in range(self.llm_concurrency)]
+        if self.report_every:
+            workers.append(asyncio.create_task(self._report()))
+
+        executor = ThreadPoolExecutor(self.render_workers, thread_name_prefix="render")
+        try:
+            await asyncio.gather(*(self._render_worker(executor) for _ in range(self.render_workers)))
+            await self._ocr_queue.join()
+            await self._llm_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executor.shutdown(wait=True)
+        print(f"Pipeline finished {len(pdf_paths)} documents; deepest queues: {self.max_depths}")
+        return self._results
@@ -1,91 +1,521 @@
 """
 process_bridge.py
 
-This script processes a PDF file by checking whether it contains selectable (text-based)
-content or is image-based.
+This script processes a PDF file page by page, checking whether each page contains selectable
+(text-based) content or is image-based.
 
-- For a text-based PDF, it directly extracts and cleans the text using pdf_text_extractor.py.
-- For an image-based PDF, it converts each page to an image, calls Paddle_OCR.py to perform OCR
-  (which outputs a PDF with OCR results), then extracts the text from the OCR PDF.
+- For a page with a text layer, it extracts and cleans that text with PyMuPDF.
+- For an image-based page, it renders the page to an in-memory image, runs OCR on it and takes
+  the text straight from the OCR results. A positional PDF of the OCR output is only written
+  when an output directory is requested.
 
-Finally, the extracted text is cleaned (trimming whitespace) and the lines are sorted alphabetically before printing.
+The page texts are merged back in page order, so a mixed document only OCRs the pages that need it.
+
+With a fingerprint index, an image page identical to a page processed before (a re-sent copy)
+takes that page's OCR result instead of being rendered and OCR'd again. Pages that only look
+alike, such as re-scans, are reused too if the index is opened with confirm=False.
+
+Finally, the word and OCR boxes of each page are grouped into rows and cells in reading order,
+so tables and label/value pairs keep their structure in the printed text.
 """
 
+import asyncio
 import os
 import sys
-import tempfile
-import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 import fitz  # PyMuPDF
 
 # Import helper modules
-from check_readable_PDFs import is_pdf_text_based
-from pdf_text_extractor import extract_clean_text
-import Paddle_OCR  # Ensure this module is in your PYTHONPATH
+from check_readable_PDFs import PAGE_IMAGE, classify_page
+from pdf_text_extractor import clean_page_text
+from ocr_processor import (
+    BatchedOCR,
+    OCRWorkerPool,
+    PageCheckpoint,
+    TwoTierOCR,
+    page_cache_key,
+    rasterize_page,
+    process_image_array,
+    ocr_results_to_text,
+    create_positional_pdf_with_font_size,
+    page_layout,
+    regions_from_ocr,
+    regions_from_words,
+    SearchablePDFWriter,
+    page_digest,
+    page_phash,
+    ocr_page_tiled,
+)
+from ocr_processor.raster import DEFAULT_MAX_PIXELS
+from ocr_processor.tiling import needs_tiling
+from ocr_processor.metrics import count, get_metrics, span
 
 
-def process_pdf(pdf_path):
+def render_page(page, copy=False, **render_options):
     """
-    Process the PDF based on its content.
+    Render a single PDF page to an in-memory image.
 
-    If the PDF is text-based, extract text directly.
-    If it is image-based, convert each page to an image, run OCR on it,
-    and then extract the OCR’d text.
+    By default the zoom is chosen from the resolution of the page's scanned
+    image and a pixel budget, and the page is rendered in grayscale.
 
     Args:
-        pdf_path (str): Path to the input PDF.
+        page (fitz.Page): The page to render.
+        copy (bool): Give the image its own buffer instead of a view on the
+            pixmap. Required when the image outlives the caller, e.g. for a pool.
+        **render_options: Passed to ocr_processor.rasterize_page (zoom,
+            grayscale, max_pixels, target_dpi, deskew).
 
     Returns:
-        str: Combined extracted text.
+        numpy.ndarray: Page image as a uint8 array.
     """
-    if not os.path.exists(pdf_path):
-        print(f"Error: File not found at {pdf_path}")
-        sys.exit(1)
+    return rasterize_page(page, copy=copy, **render_options)
+
+
+def start_page_record(page, pdf_path=None, min_page_chars=10, layout=False):
+    """
+    Classify a page and start its result record.
+
+    For pages with a usable text layer the record is complete. Pages
+    classified as PAGE_IMAGE still need OCR; fill them in with fill_ocr_text.
 
-    print(f"Checking PDF type for: {pdf_path}")
-    # Check if PDF contains selectable text
-    if is_pdf_text_based(pdf_path):
-        print("Detected text-based PDF. Extracting text directly...")
-        return extract_clean_text(pdf_path)
+    Args:
+        page (fitz.Page): The page.
+        pdf_path (str, optional): Document path, for metrics.
+        min_page_chars (int): Minimum number of text-layer characters for a
+            page to skip OCR.
+        layout (bool): Rebuild the page's rows and cells from its word boxes.
+
+    Returns:
+        dict: The page record, as described in iter_pdf_pages.
+    """
+    start = time.perf_counter()
+    with span("classify", document=pdf_path, page=page.number):
+        kind, text = classify_page(page, min_page_chars)
+    count("pages", kind=kind)
+    record = {
+        "page": page.number,
+        "kind": kind,
+        "source": "text",
+        "text": clean_page_text(text),
+        "key_values": [],
+        "ocr_results": None,
+        "width": None,
+        "height": None,
+        "timings": {"classify": time.perf_counter() - start},
+    }
+    if kind != PAGE_IMAGE and layout:
+        record["text"], record["key_values"] = page_layout(*regions_from_words(page.get_text("words")))
+    return record
+
+
+def fill_ocr_text(record, ocr_results, image_width, image_height, layout=False):
+    """
+    Fill in a page record's text from its OCR results.
+
+    Args:
+        record (dict): The page record.
+        ocr_results (list or PageResult): OCR results for the page image.
+        image_width (int): Width of the OCR'd image.
+        image_height (int): Height of the OCR'd image.
+        layout (bool): Rebuild rows and cells from the OCR boxes.
+    """
+    record.update(source="ocr", ocr_results=ocr_results, width=image_width, height=image_height)
+    if layout:
+        record["text"], record["key_values"] = page_layout(*regions_from_ocr(ocr_results))
     else:
-        print("Detected image-based PDF. Processing OCR on each page...")
-        extracted_pages = []
-        # Open the PDF with PyMuPDF
-        doc = fitz.open(pdf_path)
-        # Create a temporary directory to store image and OCR outputs
-        temp_dir = tempfile.mkdtemp(prefix="ocr_process_")
+        record["text"] = ocr_results_to_text(ocr_results)
+
+
+def iter_pdf_pages(pdf_path, ocr_pdf_dir=None, pool=None, cache=None, min_page_chars=10, lang='en', layout=False,
+                   batch_pages=1, render_options=None, searchable_pdf=None, fingerprints=None, tile_large_pages=False,
+                   checkpoint=None, page_timeout=None, two_tier=None):
+    """
+    Process a PDF page by page, yielding each page's result as soon as it is ready.
+
+    Pages with a text layer have their text extracted directly; pages without
+    one are rendered and OCR'd. Results are yielded in page order and nothing
+    is kept once a page has been yielded, so memory use does not grow with the
+    length of the document.
+
+    Each result is a dict with:
+        page (int): Zero-based page number.
+        kind (str): Page classification from check_readable_PDFs.classify_page.
+        source (str): 'text' if taken from the text layer, 'ocr' if OCR'd.
+        text (str): Cleaned page text, on a single line; with layout=True,
+            one line per row with cells separated by " | ".
+        key_values (list): (label, value) pairs found on the page; only
+            filled in with layout=True.
+        ocr_results (list or None): Raw OCR results for OCR'd pages.
+        width, height (int or None): Size of the OCR'd page image.
+        duplicate_of (dict): Only for pages whose OCR result was reused from
+            the fingerprint index: the document, page and Hamming distance of
+            the matching page, and whether its digest confirmed the match.
+        ocr_stats (dict): Only for pages OCR'd with two-tier OCR: how much of
+            the page needed the second tier (see TwoTierOCR.ocr_with_stats).
+        resumed (bool): Only for pages replayed from the checkpoint of an
+            earlier run.
+        error (str): Only for pages that could not be finished, e.g. because
+            their OCR timed out. Their text is empty.
+        timings (dict): Seconds spent classifying, rendering and running OCR.
+
+    Args:
+        pdf_path (str): Path to the input PDF.
+        ocr_pdf_dir (str, optional): Directory to write a positional PDF of the
+            OCR output for each OCR'd page. No PDFs are written when omitted.
+        pool (OCRWorkerPool, optional): Worker pool to OCR pages in parallel.
+            Pages are OCR'd one by one in this process when omitted.
+        cache (OCRCache, optional): OCR result cache keyed by page content.
+            Pages already in the cache are not OCR'd again.
+        min_page_chars (int): Minimum number of text-layer characters for a
+            page to skip OCR.
+        lang (str): OCR language, or languages joined with '+' (e.g. 'en+fa')
+            for pages that mix scripts. Ignored when a pool is given; the pool
+            uses its own language.
+        layout (bool): Rebuild each page's rows and cells from the word and OCR
+            boxes instead of joining the text into one line.
+        batch_pages (int): Without a pool, OCR this many pages together so
+            their text regions share recognition batches. Raises throughput
+            on CPU-only machines at the cost of per-page latency.
+        render_options (dict, optional): Options for rendering pages that need
+            OCR, passed to render_page (zoom, grayscale, max_pixels,
+            target_dpi, deskew).
+        searchable_pdf (str, optional): Path to write a copy of the PDF with
+            the OCR text of each OCR'd page laid invisibly over the page, so
+            the whole document becomes searchable. Pages are appended to it
+            with incremental saves as they finish. With deskew, the text layer
+            follows the straightened image and can sit slightly off the page.
+        fingerprints (FingerprintIndex, optional): Index of perceptual hashes
+            of pages processed before. Image pages that match one reuse that
+            page's OCR result without rendering or OCR, and newly OCR'd pages
+            are added to it. By default a match must also have the same page
+            digest; see FingerprintIndex for reusing look-alike pages.
+        tile_large_pages (bool): OCR pages whose full resolution exceeds the
+            render pixel budget in overlapping tiles, instead of scaling them
+            down to fit it. Keeps small print on large scans and drawings
+            readable while peak memory stays bounded by the tiles.
+        checkpoint (str, optional): Path of a checkpoint file. Every finished
+            page is appended to it as soon as it is done, and pages found in
+            it from an earlier, interrupted run of the same file and options
+            are replayed from it instead of being processed again.
+        page_timeout (float, optional): Seconds to wait for one page's OCR.
+            A page that takes longer is yielded with an error, and the OCR
+            workers are restarted so the rest of the document continues. A
+            given pool is restarted too, failing anything else queued on it,
+            so it should not be shared with other documents at the same time.
+            Without a pool, one worker process is started for the document;
+            pass a pool to keep a warm worker across documents. The wait
+            starts when the page is next in line, and tiled pages are not
+            bounded by it.
+        two_tier (dict, optional): TwoTierOCR options (min_confidence,
+            page_confidence, first_pass_scale) to OCR pages in two tiers: a
+            fast pass without angle classification, then a second pass only
+            on low-confidence regions or pages. Ignored with batch_pages > 1
+            or tiled pages; a given pool uses its own two_tier setting.
+
+    Yields:
+        dict: The result for each page, in page order.
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"Error: File not found at {pdf_path}")
+    if ocr_pdf_dir:
+        os.makedirs(ocr_pdf_dir, exist_ok=True)
+    render_options = render_options or {}
+
+    def finish_ocr(record, result):
+        """Fill in a page record from its OCR result."""
+        ocr_results, image_width, image_height, *stats = result
+        page_num = record["page"]
+        record["timings"]["ocr"] = time.perf_counter() - record["timings"].pop("ocr_start")
+        if (pool is not None or batch_ocr is not None) and "duplicate_of" not in record:
+            # Pooled and batched OCR runs elsewhere; record how long this page waited for it
+            get_metrics().record_span("ocr", record["timings"]["ocr"], {"document": pdf_path, "page": page_num})
+        print(f"OCR finished for page {page_num + 1}.")
+        if stats and stats[0] is not None:
+            record["ocr_stats"] = stats[0]
+            count("second_tier_regions", stats[0]["low_confidence_regions"])
+            count("second_tier_pages" if stats[0]["page_rerun"] else "first_tier_pages")
+
+        if ocr_pdf_dir:
+            ocr_pdf_path = os.path.join(ocr_pdf_dir, f"ocr_page_{page_num}.pdf")
+            with span("pdf_write", document=pdf_path, page=page_num):
+                create_positional_pdf_with_font_size(ocr_results, ocr_pdf_path, image_width, image_height)
+            print(f"Saved OCR output: {ocr_pdf_path}")
+        if searchable_writer is not None:
+            searchable_writer.add_page(page_num, ocr_results, image_width, image_height)
+        if page_num in page_hashes:
+            phash, digest = page_hashes.pop(page_num)
+            fingerprints.add(phash, pdf_path, page_num, ocr_results, image_width, image_height, digest=digest)
+
+        fill_ocr_text(record, ocr_results, image_width, image_height, layout)
+        if not record["text"]:
+            print(f"No text found on page {page_num + 1}.")
+
+    # With a page timeout, OCR runs in worker processes that can be killed when a page hangs
+    own_pool = None
+    if page_timeout is not None and pool is None:
+        own_pool = pool = OCRWorkerPool(workers=1, lang=lang, two_tier=two_tier)
+
+    # Perceptual hashes and digests of OCR'd pages, added to the fingerprint index once their OCR finishes
+    page_hashes = {}
+
+    # Rendered images of pages on the pool, kept with a page timeout to resubmit them after a restart
+    retry_images = {}
 
+    # Pages not yielded yet, in page order, with the OCR future for pool or batch processed pages
+    pending = deque()
+    max_pending = pool.max_pending if pool is not None else 0
+
+    # Pages waiting for a batched OCR run, as (image, cache key, future)
+    batch = []
+    batch_ocr = None
+    if pool is None and batch_pages > 1:
+        batch_ocr = BatchedOCR(lang)
+        max_pending = batch_pages
+    two_tier_ocr = TwoTierOCR(lang, **two_tier) if two_tier is not None and pool is None and batch_ocr is None else None
+
+    def flush_batch():
+        """OCR every page waiting in the batch and resolve their futures."""
+        if not batch:
+            return
+        results = batch_ocr.ocr_many([image for image, _, _ in batch])
+        for (image, key, future), ocr_results in zip(batch, results):
+            result = (ocr_results, image.shape[1], image.shape[0])
+            if key is not None:
+                cache.put(key, *result)
+            future.set_result(result)
+        batch.clear()
+
+    def collect(record, future):
+        """Finish a page from its OCR future, giving up on it after page_timeout seconds."""
+        if not future.done():
+            flush_batch()  # Don't wait on a page still sitting in a partial batch
         try:
-            for page_num in range(len(doc)):
-                print(f"\n--- Processing page {page_num + 1} of {len(doc)} ---")
-                page = doc.load_page(page_num)
-                # Increase resolution for better OCR (adjust zoom factor if needed)
-                zoom = 2
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat)
-                image_path = os.path.join(temp_dir, f"page_{page_num}.png")
-                pix.save(image_path)
-                print(f"Saved page image: {image_path}")
-
-                # Define a temporary output path for the OCR'd PDF page.
-                ocr_pdf_path = os.path.join(temp_dir, f"ocr_page_{page_num}.pdf")
-
-                # Run OCR using Paddle_OCR.py; it will create an OCR'd PDF.
-                print(f"Running OCR on page {page_num + 1}...")
-                Paddle_OCR.main(image_path, ocr_pdf_path)
-
-                # Extract text from the OCR PDF.
-                print(f"Extracting text from OCR output: {ocr_pdf_path}")
-                page_text = extract_clean_text(ocr_pdf_path)
-                if page_text:
-                    extracted_pages.append(page_text)
+            result = future.result(timeout=page_timeout)
+        except FutureTimeoutError:
+            print(f"OCR of page {record['page'] + 1} did not finish within {page_timeout} seconds; skipping it.")
+            count("pages_timed_out")
+            record["timings"].pop("ocr_start")
+            record["error"] = f"OCR timed out after {page_timeout} seconds"
+            retry_images.pop(record["page"], None)
+            # The stuck worker can only be stopped with the others; resubmit the pages they lost
+            pool.restart()
+            for i, (other, other_future) in enumerate(pending):
+                if other["page"] in retry_images and (other_future.cancelled() or other_future.exception()):
+                    pending[i] = (other, pool.submit(retry_images[other["page"]], cache=cache))
+            return
+        retry_images.pop(record["page"], None)
+        finish_ocr(record, result)
+
+    def find_duplicate(page):
+        """Look a page up in the fingerprint index, remembering its hashes to index it if there is no match."""
+        with span("fingerprint", document=pdf_path, page=page.number):
+            phash = page_phash(page)
+            digest = page_digest(page)
+            match = fingerprints.lookup(phash, digest)
+        if match is None:
+            page_hashes[page.number] = (phash, digest)
+        return match
+
+    def start_page(page):
+        """Classify a page and extract its text or start its OCR. Returns the record and the OCR future, if any."""
+        record = start_page_record(page, pdf_path, min_page_chars, layout)
+        kind = record["kind"]
+        match = find_duplicate(page) if kind == PAGE_IMAGE and fingerprints is not None else None
+
+        if match is not None:
+            if match["confirmed"]:
+                print(f"Page {page.number + 1} is identical to page {match['page'] + 1} of {match['document']}; "
+                      f"reusing its OCR result.")
+            else:
+                print(f"Warning: page {page.number + 1} only looks like page {match['page'] + 1} of "
+                      f"{match['document']} (distance {match['distance']}); reusing its OCR result unconfirmed.")
+            count("duplicate_pages", confirmed=match["confirmed"])
+            record["source"] = "ocr"
+            record["duplicate_of"] = {key: match[key] for key in ("document", "page", "distance", "confirmed")}
+            record["timings"]["ocr_start"] = time.perf_counter()
+            finish_ocr(record, (match["ocr_results"], match["width"], match["height"]))
+        elif kind == PAGE_IMAGE and tile_large_pages and needs_tiling(
+                page, render_options.get("max_pixels", DEFAULT_MAX_PIXELS), render_options.get("target_dpi")):
+            record["source"] = "ocr"
+            print(f"\n--- OCR'ing page {page.number + 1} of {len(doc)} in tiles ---")
+            record["timings"]["ocr_start"] = time.perf_counter()
+            finish_ocr(record, ocr_page_tiled(page, target_dpi=render_options.get("target_dpi"), pool=pool,
+                                              cache=cache, lang=lang,
+                                              grayscale=render_options.get("grayscale", True)))
+        elif kind == PAGE_IMAGE:
+            record["source"] = "ocr"
+            print(f"\n--- Rendering page {page.number + 1} of {len(doc)} ---")
+            start = time.perf_counter()
+            with span("render", document=pdf_path, page=page.number):
+                image = render_page(page, copy=pool is not None or batch_ocr is not None, **render_options)
+            record["timings"]["render"] = time.perf_counter() - start
+            record["timings"]["ocr_start"] = time.perf_counter()
+            if pool is not None:
+                if page_timeout is not None:
+                    retry_images[page.number] = image
+                return record, pool.submit(image, cache=cache)
+            if batch_ocr is not None:
+                future = Future()
+                key = page_cache_key(image, lang) if cache is not None else None
+                cached = cache.get(key) if key is not None else None
+                if cached is not None:
+                    future.set_result(cached)
                 else:
-                    print(f"No text found on page {page_num + 1}.")
+                    batch.append((image, key, future))
+                    if len(batch) >= batch_pages:
+                        flush_batch()
+                return record, future
+            # The image is a view on its pixmap, which it keeps alive, so rendering copies nothing
+            finish_ocr(record, process_image_array(image, cache=cache, lang=lang, two_tier=two_tier_ocr))
+        return record, None
+
+    def resume_page(record):
+        """Replay a page finished by an earlier run from the checkpoint."""
+        print(f"Page {record['page'] + 1} was finished by an earlier run; using its checkpointed result.")
+        count("pages_resumed")
+        if searchable_writer is not None and record["ocr_results"] is not None:
+            searchable_writer.add_page(record["page"], record["ocr_results"], record["width"], record["height"])
+        record["resumed"] = True
+        return record
+
+    def complete(record):
+        """Checkpoint a finished page before it is yielded."""
+        if page_checkpoint is not None and not record.get("resumed") and "error" not in record:
+            page_checkpoint.add(record)
+        return record
+
+    with span("open", document=pdf_path):
+        doc = fitz.open(pdf_path)
+    searchable_writer = SearchablePDFWriter(pdf_path, searchable_pdf) if searchable_pdf else None
+    page_checkpoint = None
+    if checkpoint:
+        options = {"layout": layout, "lang": pool.lang if pool is not None else lang,
+                   "min_page_chars": min_page_chars, "render_options": render_options,
+                   "tile_large_pages": tile_large_pages, "two_tier": two_tier}
+        page_checkpoint = PageCheckpoint(checkpoint, pdf_path, options)
+        if len(page_checkpoint):
+            print(f"Resuming {pdf_path}: {len(page_checkpoint)} of {len(doc)} pages already done.")
+
+    with doc:
+        try:
+            for page in doc:
+                stored = page_checkpoint.get(page.number) if page_checkpoint is not None else None
+                pending.append((resume_page(stored), None) if stored is not None else start_page(page))
+
+                # Yield every finished page at the head of the queue, and wait for
+                # the oldest page once too many are in flight
+                while pending and (pending[0][1] is None or pending[0][1].done() or len(pending) > max_pending):
+                    record, future = pending.popleft()
+                    if future is not None:
+                        collect(record, future)
+                    yield complete(record)
+
+            flush_batch()
+            while pending:
+                record, future = pending.popleft()
+                if future is not None:
+                    collect(record, future)
+                yield complete(record)
         finally:
-            # Remove temporary files
-            shutil.rmtree(temp_dir)
-            print(f"\nCleaned up temporary files in {temp_dir}")
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+            if own_pool is not None:
+                own_pool.close()
+            if page_checkpoint is not None:
+                page_checkpoint.close()
+            if searchable_writer is not None:
+                searchable_writer.close()
+                print(f"Saved searchable PDF: {searchable_pdf}")
 
-        return "\n".join(extracted_pages)
+
+def process_pdf(pdf_path, ocr_pdf_dir=None, pool=None, cache=None, min_page_chars=10, lang='en', layout=False,
+                batch_pages=1, render_options=None, searchable_pdf=None, fingerprints=None, tile_large_pages=False,
+                checkpoint=None, page_timeout=None, two_tier=None):
+    """
+    Process the PDF page by page based on each page's content.
+
+    Pages with a text layer have their text extracted directly. Pages without
+    one are rendered to in-memory images and OCR'd, and the text is taken from
+    the OCR results. Use iter_pdf_pages to receive pages as they finish.
+
+    Args:
+        pdf_path (str): Path to the input PDF.
+        ocr_pdf_dir (str, optional): Directory to write a positional PDF of the
+            OCR output for each OCR'd page. No PDFs are written when omitted.
+        pool (OCRWorkerPool, optional): Worker pool to OCR pages in parallel.
+            Pages are OCR'd one by one in this process when omitted.
+        cache (OCRCache, optional): OCR result cache keyed by page content.
+            Pages already in the cache are not OCR'd again.
+        min_page_chars (int): Minimum number of text-layer characters for a
+            page to skip OCR.
+        lang (str): OCR language, or languages joined with '+' (e.g. 'en+fa')
+            for pages that mix scripts. Ignored when a pool is given; the pool
+            uses its own language.
+        layout (bool): Rebuild each page's rows and cells from the word and OCR
+            boxes instead of joining the text into one line.
+        batch_pages (int): Without a pool, OCR this many pages together so
+            their text regions share recognition batches. Raises throughput
+            on CPU-only machines at the cost of per-page latency.
+        render_options (dict, optional): Options for rendering pages that need
+            OCR, passed to render_page (zoom, grayscale, max_pixels,
+            target_dpi, deskew).
+        searchable_pdf (str, optional): Path to write a searchable copy of
+            the PDF, with the OCR text laid invisibly over the OCR'd pages.
+        fingerprints (FingerprintIndex, optional): Index of page hashes;
+            pages matching an earlier page reuse its OCR result.
+        tile_large_pages (bool): OCR pages too large for the render pixel
+            budget in overlapping tiles at full resolution.
+        checkpoint (str, optional): Path of a checkpoint file that finished
+            pages are written to, so a rerun after a crash resumes where it
+            stopped.
+        page_timeout (float, optional): Seconds to wait for one page's OCR
+            before skipping the page.
+        two_tier (dict, optional): TwoTierOCR options to run the angle
+            classifier and full resolution only where confidence is low.
+
+    Returns:
+        str: Combined extracted text, one line per page (one line per row with layout=True).
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: File not found at {pdf_path}")
+        sys.exit(1)
+
+    print(f"Processing pages of: {pdf_path}")
+    pages = iter_pdf_pages(pdf_path, ocr_pdf_dir=ocr_pdf_dir, pool=pool, cache=cache,
+                           min_page_chars=min_page_chars, lang=lang, layout=layout, batch_pages=batch_pages,
+                           render_options=render_options, searchable_pdf=searchable_pdf,
+                           fingerprints=fingerprints, tile_large_pages=tile_large_pages,
+                           checkpoint=checkpoint, page_timeout=page_timeout, two_tier=two_tier)
+    return "\n".join(page["text"] for page in pages if page["text"])
+
+
+async def aiter_pdf_pages(pdf_path, **kwargs):
+    """
+    Asynchronous version of iter_pdf_pages.
+
+    Each page is produced in a worker thread so the event loop stays free
+    while pages are rendered and OCR'd. Accepts the same keyword arguments as
+    iter_pdf_pages.
+
+    Args:
+        pdf_path (str): Path to the input PDF.
+
+    Yields:
+        dict: The result for each page, in page order.
+    """
+    pages = iter_pdf_pages(pdf_path, **kwargs)
+    done = object()
+    try:
+        while True:
+            page = await asyncio.to_thread(next, pages, done)
+            if page is done:
+                break
+            yield page
+    finally:
+        pages.close()
 
 
 def clean_and_sort_text(text):
@@ -94,6 +524,8 @@ def clean_and_sort_text(text):
 
     Splits the text into lines, removes extra whitespace,
     sorts the lines alphabetically, and rejoins them.
+    Sorting loses reading order; prefer process_pdf(..., layout=True) for
+    text that is passed on for data extraction.
 
     Args:
         text (str): The raw extracted text.
@@ -117,13 +549,15 @@ def main():
         print("No PDF path provided. Exiting.")
         sys.exit(1)
 
+    # Optional second argument: directory for positional OCR PDFs
+    ocr_pdf_dir = sys.argv[2] if len(sys.argv) > 2 else None
+
     print(f"\nStarting processing for PDF: {pdf_path}\n")
-    extracted_text = process_pdf(pdf_path)
+    extracted_text = process_pdf(pdf_path, ocr_pdf_dir=ocr_pdf_dir, layout=True)
 
     if extracted_text:
-        cleaned_sorted_text = clean_and_sort_text(extracted_text)
-        print("\n--- Extracted, Cleaned & Sorted Text ---\n")
-        print(cleaned_sorted_text)
+        print("\n--- Extracted Text (reading order) ---\n")
+        print(extracted_text)
     else:
         print("No text could be extracted from the PDF.")
 
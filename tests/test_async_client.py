@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# openai_demo_final imports its modules by name, as when run from its directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "openai_demo_final"))
+
+from async_client import AsyncAssistantClient  # noqa: E402
+
+
+class StubAssistants(BaseHTTPRequestHandler):
+    """
+    The Assistants endpoints used by AsyncAssistantClient, kept in memory.
+
+    Runs finish as soon as they are polled. The server's state dict controls
+    the failures: rate_limit_threads answers that many thread creations with
+    a 429, and drop_run_creates creates that many runs but closes the
+    connection before replying.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _path(self):
+        return [part for part in self.path.split("?")[0].strip("/").split("/") if part != "v1"]
+
+    def do_POST(self):
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        path = self._path()
+        with state["lock"]:
+            if path == ["threads"]:
+                if state["rate_limit_threads"]:
+                    state["rate_limit_threads"] -= 1
+                    return self._send(429, {"error": {"message": "slow down", "type": "rate_limit"}},
+                                      {"retry-after": "0.01"})
+                thread_id = f"thread_{len(state['threads'])}"
+                state["threads"][thread_id] = [message["content"] for message in body.get("messages", [])]
+                return self._send(200, {"id": thread_id, "object": "thread", "created_at": 0, "metadata": {}})
+            if len(path) == 3 and path[2] == "runs":
+                if any(run["status"] != "completed" for run in state["runs"] if run["thread_id"] == path[1]):
+                    return self._send(400, {"error": {"message": "Thread already has an active run.",
+                                                      "type": "invalid_request_error"}})
+                run = _run(f"run_{len(state['runs'])}", path[1], "queued")
+                state["runs"].append(run)
+                if state["drop_run_creates"]:
+                    state["drop_run_creates"] -= 1
+                    self.close_connection = True
+                    return
+                return self._send(200, run)
+        self._send(404, {})
+
+    def do_GET(self):
+        state = self.server.state
+        path = self._path()
+        with state["lock"]:
+            if len(path) == 3 and path[2] == "runs":
+                runs = [run for run in reversed(state["runs"]) if run["thread_id"] == path[1]][:1]
+                return self._send(200, _page(runs))
+            if len(path) == 4 and path[2] == "runs":
+                run = next(run for run in state["runs"] if run["id"] == path[3])
+                run["status"] = "completed"
+                return self._send(200, run)
+            if len(path) == 3 and path[2] == "messages":
+                parts = state["threads"][path[1]]
+                reply = f"{len(parts)} parts"
+                return self._send(200, _page([_message(path[1], reply)]))
+        self._send(404, {})
+
+
+def _run(run_id, thread_id, status):
+    return {"id": run_id, "object": "thread.run", "created_at": 0, "thread_id": thread_id,
+            "assistant_id": "asst_1", "status": status, "instructions": "", "model": "gpt-4o", "tools": [],
+            "parallel_tool_calls": True, "last_error": None, "metadata": {}}
+
+
+def _message(thread_id, text):
+    return {"id": "msg_1", "object": "thread.message", "created_at": 0, "thread_id": thread_id,
+            "role": "assistant", "status": "completed", "attachments": [], "metadata": {},
+            "assistant_id": "asst_1", "run_id": "run_0",
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}]}
+
+
+def _page(data):
+    return {"object": "list", "data": data, "first_id": None, "last_id": None, "has_more": False}
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAssistants)
+    server.state = {"lock": threading.Lock(), "threads": {}, "runs": [], "rate_limit_threads": 0,
+                    "drop_run_creates": 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _process(server, text, **options):
+    async def run():
+        async with AsyncAssistantClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                                        assistant_id="asst_1", max_retries=2, **options) as client:
+            return await client.process_document(text)
+    return asyncio.run(run())
+
+
+def test_rate_limited_thread_creation_is_retried(server):
+    server.state["rate_limit_threads"] = 1
+    assert _process(server, "Invoice total 120.00") == "1 parts"
+    assert len(server.state["threads"]) == 1
+
+
+def test_dropped_run_create_polls_the_existing_run(server):
+    server.state["drop_run_creates"] = 1
+    assert _process(server, "Invoice total 120.00") == "1 parts"
+    assert len(server.state["runs"]) == 1
+    assert server.state["runs"][0]["status"] == "completed"
+
+
+def test_long_document_is_sent_in_parts(server):
+    text = " ".join(f"word{i}" for i in range(400))
+    assert _process(server, text, chunk_tokens=200) != "1 parts"
+    parts = server.state["threads"]["thread_0"]
+    assert parts[0].startswith(f"Part 1 of {len(parts)}:\n")
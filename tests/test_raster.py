@@ -0,0 +1,45 @@
+import gc
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+
+from ocr_processor import pixmap_to_array, rasterize_page
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """A two-page PDF whose pages are noise images, so a stale buffer cannot match by chance."""
+    rng = np.random.default_rng(0)
+    path = tmp_path / "scan.pdf"
+    with fitz.open() as doc:
+        for _ in range(2):
+            samples = rng.integers(0, 256, size=(300, 200), dtype=np.uint8)
+            pix = fitz.Pixmap(fitz.csGRAY, 200, 300, samples.tobytes(), False)
+            page = doc.new_page(width=200, height=300)
+            page.insert_image(page.rect, pixmap=pix)
+        doc.save(path)
+    return path
+
+
+@pytest.mark.parametrize("grayscale", [True, False])
+def test_rasterize_view_matches_copy(scanned_pdf, grayscale):
+    with fitz.open(scanned_pdf) as doc:
+        for page in doc:
+            view = rasterize_page(page, zoom=2, grayscale=grayscale)
+            # Allocate and free memory the pixmap would have been reused for
+            del [bytearray(view.nbytes) for _ in range(8)][:]
+            gc.collect()
+            copy = rasterize_page(page, zoom=2, grayscale=grayscale, copy=True)
+            assert view.shape == copy.shape
+            assert np.array_equal(view, copy)
+
+
+def test_pixmap_view_outlives_pixmap_reference():
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 3), False)
+    pix.set_rect(pix.irect, (10, 20, 30))
+    image = pixmap_to_array(pix)
+    del pix
+    gc.collect()
+    assert image.shape == (3, 4, 3)
+    assert (image == [10, 20, 30]).all()
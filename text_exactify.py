@@ -1,11 +1,9 @@
 import cv2
-from paddleocr import PaddleOCR
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import os
 
-# Initialize PaddleOCR (supports multiple languages, including English and Persian)
-ocr = PaddleOCR(use_angle_cls=True, lang='en')  # Change 'en' to 'fa' for Farsi if needed
+from ocr_processor.engine import get_ocr_engine
 
 # Function to calculate font size based on bounding box height
 def calculate_font_size(bbox):
@@ -65,16 +63,15 @@ def main(image_path, output_pdf_path):
         print(f"Error: File not found at {image_path}")
         return
 
-    # Load the image and convert to grayscale
+    # Load the image
     image = cv2.imread(image_path)
     if image is None:
         print(f"Error: Unable to load image at {image_path}")
         return
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-    # Perform OCR using PaddleOCR
-    ocr_results = ocr.ocr(image_path, cls=True)
+    # Perform OCR using the shared PaddleOCR engine (supports multiple languages,
+    # including English and Persian; pass lang='fa' for Farsi)
+    ocr_results = get_ocr_engine(lang='en').ocr(image_path, cls=True)
 
     # Get the image dimensions
     image_height, image_width, _ = image.shape